@@ -0,0 +1,229 @@
+"""
+Benchmarks building the spec of synthetic apps.
+
+    python benchmarks/build_spec.py --routes 2000 --models 500 -o results.json
+    python benchmarks/build_spec.py --baseline results.json
+
+Results are printed (or written) as JSON, and can be compared against an
+earlier run with --baseline, which fails when the build got slower than the
+given tolerance.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from enum import Enum
+from typing import List, Optional, Union
+
+from sanic import Sanic
+from sanic.blueprints import Blueprint
+from sanic.response import text
+from sanic.views import CompositionView, HTTPMethodView
+from sanic_swagger import doc, openapi, openapi_blueprint
+
+
+def make_enum(index):
+    return Enum('Enum{}'.format(index), ['A', 'B', 'C'])
+
+
+def make_models(count, enums):
+    models = []
+    for index in range(count):
+        annotations = {
+            'name': str,
+            'count': int,
+            'ratio': Optional[float],
+            'value': Union[str, int],
+            'kind': enums[index % len(enums)],
+        }
+        body = {
+            'name': doc.field(description='name', max_length=64),
+            'count': doc.field(minimum=0),
+            'ratio': doc.field(default=None),
+            'value': doc.field(default=None),
+            'kind': doc.field(default=None),
+        }
+        if models:
+            # Nest the models a few levels deep
+            annotations['child'] = Optional[models[index // 2]]
+            annotations['children'] = List[models[index // 3]]
+            body['child'] = doc.field(default=None)
+            body['children'] = doc.field(default=None)
+        body['__annotations__'] = annotations
+        models.append(type('Model{}'.format(index), (doc.Model,), body))
+    return models
+
+
+def make_handler(index, model):
+    async def handler(request, **kwargs):
+        return text('')
+
+    handler.__name__ = 'handler_{}'.format(index)
+    doc.summary('Handler {}'.format(index))(handler)
+    doc.consumes(model, location='body')(handler)
+    doc.produces(model)(handler)
+    doc.response('404', 'Not found', model=model)(handler)
+    return handler
+
+
+def make_view(index, model):
+    @doc.summary('View {}'.format(index))
+    @doc.produces(model)
+    def get(self, request, **kwargs):
+        return text('')
+
+    @doc.consumes(model, location='body')
+    def post(self, request, **kwargs):
+        return text('')
+
+    return type(
+        'View{}'.format(index), (HTTPMethodView,), {'get': get, 'post': post}
+    )
+
+
+def make_app(args):
+    app = Sanic('benchmark_{}'.format(time.time()).replace('.', '_'))
+    app.blueprint(openapi_blueprint)
+
+    enums = [make_enum(index) for index in range(max(args.enums, 1))]
+    models = make_models(max(args.models, 1), enums)
+    blueprints = [
+        Blueprint('bp{}'.format(index), url_prefix='/bp{}'.format(index))
+        for index in range(args.blueprints)
+    ]
+
+    for index in range(args.routes):
+        model = models[index % len(models)]
+        uri = '/route{}/<id:int>/<name>'.format(index)
+        target = blueprints[index % len(blueprints)] if blueprints else app
+        kind = index % 10
+        if kind < args.views:
+            target.add_route(make_view(index, model).as_view(), uri)
+        elif kind < args.views + args.compositions:
+            view = CompositionView()
+            view.add(['GET'], make_handler(index, model))
+            view.add(['POST', 'PUT'], make_handler(-index, model))
+            # Sanic can't name CompositionViews added to blueprints
+            app.add_route(view, uri)
+        else:
+            target.add_route(
+                make_handler(index, model), uri, methods=['GET', 'POST']
+            )
+
+    for blueprint in blueprints:
+        app.blueprint(blueprint)
+    return app
+
+
+def measure(app, repeat):
+    # Builds as served, compressed variants included
+    timings = []
+    phases = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        spec, encoded = openapi._compile_spec(app)
+        timings.append(time.perf_counter() - start)
+        phases.append(openapi.build_stats(app).phases)
+
+    # Traced apart, as tracemalloc slows every phase down
+    tracemalloc.start()
+    openapi._compile_spec(app)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'phases': {
+            name: statistics.median(run.get(name, 0.0) for run in phases)
+            for name in phases[0]
+        },
+        'build_seconds_min': min(timings),
+        'build_seconds_median': statistics.median(timings),
+        'encode_seconds_median': statistics.median(
+            run['encode'] for run in phases
+        ),
+        'peak_memory_bytes': peak,
+        'spec_bytes': len(encoded.body),
+        'gzip_bytes': len(encoded.gzip or b''),
+        'brotli_bytes': len(encoded.brotli or b''),
+        'paths': len(spec['paths']),
+        'definitions': len(spec['definitions']),
+    }
+
+
+def compare(results, baseline, tolerance):
+    key = 'build_seconds_median'
+    slowdown = results[key] / baseline[key] - 1
+    if slowdown > tolerance:
+        print(
+            'Build is {:.0%} slower than the baseline ({:.4f}s vs {:.4f}s)'
+            .format(slowdown, results[key], baseline[key]),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--routes', type=int, default=1000)
+    parser.add_argument('--models', type=int, default=200)
+    parser.add_argument('--enums', type=int, default=20)
+    parser.add_argument('--blueprints', type=int, default=10)
+    parser.add_argument(
+        '--views',
+        type=int,
+        default=2,
+        help='routes out of every 10 using an HTTPMethodView',
+    )
+    parser.add_argument(
+        '--compositions',
+        type=int,
+        default=1,
+        help='routes out of every 10 using a CompositionView',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help='write the results here')
+    parser.add_argument('--baseline', help='results of an earlier run')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='allowed slowdown against the baseline, 0.2 means 20%%',
+    )
+    args = parser.parse_args(argv)
+
+    app = make_app(args)
+    results = {
+        'parameters': {
+            name: getattr(args, name)
+            for name in (
+                'routes',
+                'models',
+                'enums',
+                'blueprints',
+                'views',
+                'compositions',
+                'repeat',
+            )
+        },
+        'python': sys.version.split()[0],
+        **measure(app, args.repeat),
+    }
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            return compare(results, json.load(f), args.tolerance)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
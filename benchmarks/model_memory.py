@@ -0,0 +1,87 @@
+"""
+Benchmarks the memory held by many Model instances.
+
+    python benchmarks/model_memory.py --instances 100000 -o results.json
+
+Compares the same Model declared with a __dict__, with `slots=True`, and
+with `slots=True, frozen=True, cache_hash=True`.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from sanic_swagger import doc
+
+
+def make_model(name, **options):
+    body = {
+        '__annotations__': {'name': str, 'count': int, 'ratio': float},
+        'name': doc.field(max_length=64),
+        'count': doc.field(minimum=0),
+        'ratio': doc.field(default=0.5),
+    }
+    return type(name, (doc.Model,), body, **options)
+
+
+variants = {
+    'dict': {},
+    'slots': {'slots': True},
+    'slots_frozen_cache_hash': {
+        'slots': True,
+        'frozen': True,
+        'cache_hash': True,
+    },
+}
+
+
+def measure(model, instances):
+    names = [str(index) for index in range(instances)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [model(name=names[index], count=index) for index in range(
+        instances
+    )]
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return {
+        'bytes': size,
+        'bytes_per_instance': size / instances,
+        'construct_seconds': seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--instances', type=int, default=100000)
+    parser.add_argument('-o', '--output', help='write the results here')
+    args = parser.parse_args(argv)
+
+    results = {
+        'parameters': {'instances': args.instances},
+        'python': sys.version.split()[0],
+        'variants': {
+            name: measure(
+                make_model('Model_{}'.format(name), **options),
+                args.instances,
+            )
+            for name, options in variants.items()
+        },
+    }
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
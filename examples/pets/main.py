@@ -1,6 +1,4 @@
-import cattr
 from sanic import Sanic
-from sanic.response import json
 from sanic_swagger import (
     doc,
     openapi_blueprint,
@@ -23,7 +21,7 @@ class Pet(doc.Model):
 @doc.produces(Pet)
 async def root(req):
     pet = Pet('Chopper', 3)
-    return json(cattr.unstructure(pet))
+    return doc.json_response(pet)
 
 
 if __name__ == '__main__':
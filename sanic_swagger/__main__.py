@@ -0,0 +1,56 @@
+"""
+Command line entry point, run with `python -m sanic_swagger`.
+"""
+
+import argparse
+import os
+import sys
+from importlib import import_module
+
+from .openapi import _compile_spec
+
+
+def _import_app(path):
+    module_name, _, app_name = path.partition(':')
+    if not module_name or not app_name:
+        raise ValueError(
+            'Expected the app as <module>:<name>, got {!r}'.format(path)
+        )
+    return getattr(import_module(module_name), app_name)
+
+
+def build(args):
+    app = _import_app(args.app)
+    _, encoded = _compile_spec(app, compress=not args.no_compress)
+    encoded.save(args.output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sanic_swagger')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    build_parser = commands.add_parser(
+        'build',
+        help='build the spec of an app into a file, to be loaded at startup '
+        'with API_SPEC_ARTIFACT',
+    )
+    build_parser.add_argument('app', help='the app to document, module:name')
+    build_parser.add_argument(
+        '-o', '--output', default='spec.json', help='where to write the spec'
+    )
+    build_parser.add_argument(
+        '--no-compress',
+        action='store_true',
+        help='skip writing the precompressed .gz (and .br) variants',
+    )
+    build_parser.set_defaults(func=build)
+
+    args = parser.parse_args(argv)
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
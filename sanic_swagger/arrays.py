@@ -0,0 +1,94 @@
+"""
+Numeric array field types.
+
+Fields annotated with them store their values packed in an `array.array`,
+instead of a list of boxed ints or floats:
+
+    class Samples(doc.Model):
+        values: FloatArray = doc.field(minimum=0, max_items=100000)
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class NumericArray(array):
+    _typecode = None
+    item_type = None
+
+    def __new__(cls, values=()):
+        result = super().__new__(cls, cls._typecode)
+        if isinstance(values, list):
+            result.fromlist(values)
+        elif _is_buffer(values):
+            view = memoryview(values)
+            if view.c_contiguous and (
+                view.format == cls._typecode
+                or view.format in _aliases.get(cls._typecode, ())
+            ):
+                # Copies the packed values at once, e.g. from numpy arrays
+                result.frombytes(view.cast('B'))
+            else:
+                result.fromlist(view.tolist())
+        else:
+            result.extend(values)
+        return result
+
+    @classmethod
+    def convert(cls, values):
+        if type(values) is cls:
+            return values
+        return cls(values)
+
+    def as_numpy(self):
+        """
+        Returns a NumPy array sharing the memory of this one.
+        """
+        if numpy is None:
+            raise RuntimeError('NumPy is not installed')
+        return numpy.frombuffer(self, dtype=self.typecode)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.tolist())
+
+    def __reduce__(self):
+        return type(self), (self.tolist(),)
+
+
+class FloatArray(NumericArray):
+    """
+    Array of doubles, documented as numbers with a `double` format.
+    """
+
+    _typecode = 'd'
+    item_type = float
+
+
+class IntArray(NumericArray):
+    """
+    Array of signed 64-bit integers, documented as integers with an `int64`
+    format.
+    """
+
+    _typecode = 'q'
+    item_type = int
+
+
+# memoryview formats of buffers with the same layout as the typecode
+_aliases = {'q': ('l',) if array('l').itemsize == 8 else ()}
+
+
+def _is_buffer(values):
+    try:
+        memoryview(values)
+    except TypeError:
+        return False
+    return True
+
+
+def is_numeric_array(type_):
+    return isinstance(type_, type) and issubclass(type_, NumericArray)
@@ -0,0 +1,119 @@
+"""
+Binary (`format: byte`) field values.
+
+JSON carries them as base64 text, which LazyBytes keeps as it is until the
+bytes are actually needed, so that values only passed along are neither
+decoded nor encoded again.
+"""
+
+import re
+from base64 import b64encode
+from binascii import a2b_base64
+
+# Multiple of 3, so that chunks encode without padding
+_chunk_size = 3 * 2 ** 16
+
+# a2b_base64 skips characters outside of the alphabet, which would then be
+# encoded back as they came
+_base64 = re.compile(r'[A-Za-z0-9+/]*={0,2}\Z')
+
+
+class LazyBytes:
+    """
+    Bytes decoded from base64 on first use, into a memoryview that slices
+    without copying. Invalid base64 raises a ValueError when decoded.
+    """
+
+    __slots__ = ('_encoded', '_view')
+
+    def __init__(self, encoded=None, view=None):
+        self._encoded = encoded
+        self._view = view
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(view=memoryview(data))
+
+    @classmethod
+    def convert(cls, value):
+        """
+        Converter of bytes fields: base64 strings are checked and kept
+        encoded, while bytes-like values are already decoded and left as they
+        are.
+        """
+        if isinstance(value, str):
+            if len(value) % 4 or _base64.match(value) is None:
+                raise ValueError('Bytes must be given as base64 text')
+            return cls(value)
+        return value
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = memoryview(a2b_base64(self._encoded))
+        return self._view
+
+    @property
+    def decoded(self):
+        return self._view is not None
+
+    def tobytes(self):
+        return self.view.tobytes()
+
+    def to_json(self):
+        if self._encoded is None:
+            self._encoded = b64encode(self._view).decode('ascii')
+        return '"' + self._encoded + '"'
+
+    def __bytes__(self):
+        return self.tobytes()
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, index):
+        return self.view[index]
+
+    def __eq__(self, other):
+        if isinstance(other, LazyBytes):
+            other = other.view
+        try:
+            return self.view == other
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(self.tobytes())
+
+    def __repr__(self):
+        if self._view is None:
+            return 'LazyBytes({!r})'.format(self._encoded)
+        return 'LazyBytes.from_bytes({!r})'.format(self.tobytes())
+
+
+def encode_bytes(value):
+    """
+    Encodes bytes-like values into a JSON string of base64, reusing the text
+    LazyBytes were decoded from.
+    """
+    if isinstance(value, LazyBytes):
+        return value.to_json()
+    return '"' + b64encode(value).decode('ascii') + '"'
+
+
+def iter_base64(value, chunk_size=_chunk_size):
+    """
+    Yields the base64 of bytes-like values chunk by chunk, without encoding
+    (or copying) all of it at once, e.g. to write it to a streamed response.
+    """
+    if isinstance(value, LazyBytes):
+        if not value.decoded:
+            encoded = value._encoded
+            for start in range(0, len(encoded), chunk_size):
+                yield encoded[start:start + chunk_size].encode('ascii')
+            return
+        value = value.view
+    view = memoryview(value).cast('B')
+    chunk_size -= chunk_size % 3
+    for start in range(0, len(view), chunk_size):
+        yield b64encode(view[start:start + chunk_size])
@@ -0,0 +1,158 @@
+"""
+Handlers receiving the Models of their request body.
+
+`doc.consumes(Model, location='body', offload_threshold=...)` wraps handlers
+so that the body is parsed, structured and validated before they're called,
+and given to them as the `body` keyword argument. Bodies larger than the
+threshold (in bytes) are handled in the `API_OFFLOAD_EXECUTOR` of the app, or
+the default executor of the loop, so that they don't block it.
+
+`doc.consumes(List[Model], location='body', stream=True)` gives them an async
+iterator of the Models instead, decoded as the body arrives.
+"""
+
+import asyncio
+from functools import partial, wraps
+from inspect import isawaitable
+
+from sanic.exceptions import InvalidUsage
+from sanic.request import Request, json_loads
+
+from .codegen import array_item_type
+from .streaming import decoder_for, default_max_item_size, iter_body_chunks
+from .validators import validate_async
+
+
+def body_model(type_):
+    """
+    Returns the Model of a body declared as `type_`, and whether the body is
+    a list of them.
+    """
+    item_type = array_item_type(type_)
+    if item_type is not None and hasattr(item_type, 'from_dict'):
+        return item_type, True
+    if hasattr(type_, 'from_dict'):
+        return type_, False
+    raise TypeError(
+        'Only Models or lists of Models can be structured, not {}'.format(
+            type_
+        )
+    )
+
+
+def structure_body(model, many, body):
+    """
+    Parses a JSON body into Models, validating them. Being a module level
+    function, it can run in process pools too.
+    """
+    data = json_loads(body)
+    if many:
+        if not isinstance(data, list):
+            raise ValueError('The body must be a JSON array')
+        return model.from_list(data)
+    if not isinstance(data, dict):
+        raise ValueError('The body must be a JSON object')
+    return model.from_dict(data)
+
+
+def find_request(args):
+    # Handlers of views get the view first
+    for arg in args:
+        if isinstance(arg, Request):
+            return arg
+    raise TypeError('The handler was called without a request')
+
+
+def structuring_handler(handler, type_, offload_threshold):
+    model, many = body_model(type_)
+    structure = partial(structure_body, model, many)
+
+    @wraps(handler)
+    async def structure_then_handle(*args, **kwargs):
+        request = find_request(args)
+        body = request.body
+        try:
+            if len(body) > offload_threshold:
+                value = await asyncio.get_event_loop().run_in_executor(
+                    request.app.config.get('API_OFFLOAD_EXECUTOR'),
+                    structure,
+                    body,
+                )
+            else:
+                value = structure(body)
+            await validate_async(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidUsage(str(e))
+
+        response = handler(*args, body=value, **kwargs)
+        if isawaitable(response):
+            response = await response
+        return response
+
+    return structure_then_handle
+
+
+def streaming_handler(handler, type_, chunk_size=None):
+    model, many = body_model(type_)
+    if not many:
+        raise TypeError('Only lists of Models can be streamed')
+
+    @wraps(handler)
+    async def stream_then_handle(*args, **kwargs):
+        request = find_request(args)
+        items = iter_models(request, model, chunk_size)
+        response = handler(*args, body=items, **kwargs)
+        if isawaitable(response):
+            response = await response
+        return response
+
+    # Has Sanic stream the body of routes declared with stream=True, including
+    # those of views
+    stream_then_handle.is_stream = True
+    return stream_then_handle
+
+
+async def iter_models(request, model, chunk_size=None):
+    """
+    Yields the Models of a JSON array or NDJSON body as it arrives, one by
+    one, or in lists of up to `chunk_size`.
+    """
+    decoder = decoder_for(
+        request.content_type,
+        request.app.config.get(
+            'API_STREAM_MAX_ITEM_SIZE', default_max_item_size
+        ),
+    )
+    chunk = []
+    try:
+        async for data in iter_body_chunks(request):
+            for item in decoder.feed(data):
+                chunk.append(_structure_item(model, item))
+                if chunk_size is None or len(chunk) == chunk_size:
+                    await _validate_chunk(chunk)
+                    if chunk_size is None:
+                        yield chunk[0]
+                    else:
+                        yield chunk
+                    chunk = []
+        for item in decoder.close():
+            chunk.append(_structure_item(model, item))
+        await _validate_chunk(chunk)
+    except (TypeError, ValueError) as e:
+        raise InvalidUsage(str(e))
+    if chunk_size is None:
+        for item in chunk:
+            yield item
+    elif chunk:
+        yield chunk
+
+
+def _structure_item(model, item):
+    if not isinstance(item, dict):
+        raise ValueError('Items must be JSON objects')
+    return model.from_dict(item)
+
+
+async def _validate_chunk(chunk):
+    if chunk:
+        await validate_async(chunk)
@@ -0,0 +1,164 @@
+"""
+Responses of GET routes cached in process.
+
+`doc.cache(ttl=60, vary=['Accept-Language'])` keeps the 200 responses of a
+route, keyed by path, query string and the `vary` headers, and serves them
+as EncodedBody, with an ETag and their compressed variants.
+"""
+
+from collections import OrderedDict
+from functools import wraps
+from inspect import isawaitable
+from time import monotonic
+
+from sanic.response import HTTPResponse
+
+from .bodies import find_request
+from .encoded import EncodedBody, encoded_response
+
+# Smaller bodies aren't worth compressing
+_compress_min_size = 1024
+
+# Bodies are compressed on the loop when they're cached, at the fastest
+# levels: a few milliseconds for hundreds of KB instead of hundreds
+_gzip_level = 1
+_brotli_quality = 1
+
+# Headers of the handler's response that are replaced by those of the cache
+_replaced_headers = frozenset(
+    ('content-length', 'content-type', 'etag', 'cache-control', 'vary')
+)
+
+
+class ResponseCache:
+    """
+    An LRU of encoded responses, expiring `ttl` seconds after being stored.
+    Entries are `(expires, encoded, headers)` tuples.
+    """
+
+    ttl = None
+    vary = None
+    max_entries = None
+    hits = 0
+    misses = 0
+
+    def __init__(self, ttl, vary=(), max_entries=1024):
+        self.ttl = ttl
+        self.vary = tuple(vary)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def key(self, request):
+        return (
+            request.path,
+            request.query_string,
+            tuple(request.headers.get(name) for name in self.vary),
+        )
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, encoded, headers):
+        entry = (monotonic() + self.ttl, encoded, headers)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def headers(self, expires):
+        """
+        Returns the headers of a response stored until `expires`, which
+        clients may keep for the rest of its lifetime only.
+        """
+        remaining = max(0, int(expires - monotonic()))
+        headers = {'Cache-Control': 'max-age={}'.format(remaining)}
+        if self.vary:
+            headers['Vary'] = ', '.join(self.vary)
+        return headers
+
+    def documented_headers(self):
+        """
+        Returns the headers of cached responses, as documented in the spec.
+        """
+        headers = {
+            'Cache-Control': {
+                'type': 'string',
+                'description': 'max-age of at most {}, the seconds left '
+                'before the cached response expires'.format(self.ttl),
+            },
+            'ETag': {
+                'type': 'string',
+                'description': 'Validates the response with If-None-Match',
+            },
+        }
+        if self.vary:
+            headers['Vary'] = {
+                'type': 'string',
+                'description': ', '.join(self.vary),
+            }
+        return headers
+
+
+def caching_handler(handler, cache):
+
+    @wraps(handler)
+    async def serve_cached(*args, **kwargs):
+        request = find_request(args)
+        if request.method != 'GET':
+            response = handler(*args, **kwargs)
+            if isawaitable(response):
+                response = await response
+            return response
+
+        key = cache.key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(*args, **kwargs)
+            if isawaitable(response):
+                response = await response
+            if not _is_cacheable(response):
+                return response
+            entry = cache.put(
+                key,
+                EncodedBody(
+                    response.body,
+                    content_type=response.content_type,
+                    compress=len(response.body) >= _compress_min_size,
+                    brotli_quality=_brotli_quality,
+                    gzip_level=_gzip_level,
+                ),
+                {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name.lower() not in _replaced_headers
+                },
+            )
+
+        expires, encoded, headers = entry
+        return encoded_response(
+            request, encoded, headers={**headers, **cache.headers(expires)}
+        )
+
+    return serve_cached
+
+
+def _is_cacheable(response):
+    # Streamed responses have no body, and cookies are someone's
+    return (
+        type(response) is HTTPResponse
+        and response.status == 200
+        and getattr(response, '_cookies', None) is None
+    )
@@ -0,0 +1,146 @@
+"""
+Helpers for generating specialized functions for Models.
+"""
+
+import linecache
+from enum import Enum
+from itertools import count
+from typing import (
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Sequence,
+    Set,
+    Union,
+)
+
+import attr
+
+_ids = count()
+
+NoneType = type(None)
+array_types = (List, Set, Sequence, Collection, Iterable)
+mapping_types = (Dict, Mapping)
+
+
+def compile_function(name, lines, namespace, owner):
+    """
+    Compiles the function `name` defined by the source `lines`, with the
+    globals in `namespace`. The source is registered with linecache so that
+    tracebacks going through it are readable.
+    """
+    source = '\n'.join(lines) + '\n'
+    filename = '<generated {} of {} #{}>'.format(
+        name, getattr(owner, '__qualname__', owner), next(_ids)
+    )
+    exec(compile(source, filename, 'exec'), namespace)
+    linecache.cache[filename] = (
+        len(source),
+        None,
+        source.splitlines(True),
+        filename,
+    )
+    return namespace[name]
+
+
+def reference(namespace, prefix, value):
+    """
+    Adds `value` to `namespace` under a new name, for generated code to use.
+    """
+    name = '_{}_{}'.format(prefix, len(namespace))
+    namespace[name] = value
+    return name
+
+
+def optional_type(type_):
+    """
+    Returns T when `type_` is Optional[T], otherwise None.
+    """
+    if getattr(type_, '__origin__', None) is Union:
+        args = type_.__args__
+        if len(args) == 2 and NoneType in args:
+            return args[0] if args[1] is NoneType else args[1]
+    return None
+
+
+def array_item_type(type_):
+    """
+    Returns the item type of List[T] and similar generics, otherwise None.
+    """
+    if getattr(type_, '__base__', None) in array_types:
+        args = type_.__args__
+        return args[0] if args else object
+    return None
+
+
+def mapping_value_type(type_):
+    """
+    Returns the value type of Dict[K, V] and Mapping[K, V], otherwise None.
+    """
+    if getattr(type_, '__base__', None) in mapping_types:
+        args = type_.__args__
+        return args[1] if args else object
+    return None
+
+
+def union_types(type_):
+    """
+    Returns the types of Union[...], without None, otherwise None.
+    """
+    if getattr(type_, '__origin__', None) is Union:
+        return tuple(arg for arg in type_.__args__ if arg is not NoneType)
+    return None
+
+
+class DispatchTable(dict):
+    """
+    Maps the values of a discriminator property to the Models of a Union.
+    """
+
+    def __init__(self, property_name, types):
+        super().__init__()
+        self.property_name = property_name
+        for type_ in types:
+            value = discriminator_value(type_, property_name)
+            if value in self:
+                raise TypeError(
+                    '{} and {} have the same {} {!r}'.format(
+                        self[value].__name__,
+                        type_.__name__,
+                        property_name,
+                        value,
+                    )
+                )
+            self[value] = type_
+
+    def __missing__(self, value):
+        raise ValueError(
+            "'{}' must be one of {}, not {!r}".format(
+                self.property_name, ', '.join(map(repr, self)), value
+            )
+        )
+
+
+def discriminator_value(type_, property_name):
+    """
+    Returns the value of the discriminator property identifying `type_`: the
+    default of its field, otherwise the name of the class. The field itself
+    is required, so that instances are created from and encoded into
+    payloads holding the property.
+    """
+    field = getattr(attr.fields(type_), property_name, None)
+    if field is None:
+        raise TypeError(
+            "{} must have a '{}' field to be discriminated".format(
+                type_.__name__, property_name
+            )
+        )
+    if field.default is attr.NOTHING or isinstance(
+        field.default, attr.Factory
+    ):
+        return type_.__name__
+    if isinstance(field.default, Enum):
+        return field.default.value
+    return field.default
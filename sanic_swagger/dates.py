@@ -0,0 +1,84 @@
+"""
+ISO 8601 converters of date and datetime fields.
+
+Parsing goes through ciso8601 when it's installed (the `ciso8601` extra),
+otherwise through a regular expression, both behind a small cache since
+payloads tend to repeat the same dates.
+"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+try:
+    import ciso8601
+except ImportError:  # pragma: no cover
+    ciso8601 = None
+
+_date = re.compile(r'(\d{4})-(\d{2})-(\d{2})$')
+_datetime = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})'
+    r'(?::(\d{2})(?:[.,](\d{1,6})\d*)?)?'
+    r'(Z|[+-]\d{2}(?::?\d{2})?)?$',
+    re.IGNORECASE,
+)
+
+
+def _timezone(offset):
+    if offset in ('Z', 'z'):
+        return timezone.utc
+    sign = -1 if offset[0] == '-' else 1
+    hours = int(offset[1:3])
+    minutes = int(offset[-2:]) if len(offset) > 3 else 0
+    return timezone(sign * timedelta(hours=hours, minutes=minutes))
+
+
+def _parse_datetime(value):
+    match = _datetime.match(value)
+    if match is None:
+        raise ValueError('{!r} is not an ISO 8601 datetime'.format(value))
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    return datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour),
+        int(minute),
+        int(second or 0),
+        int(fraction.ljust(6, '0')) if fraction else 0,
+        _timezone(offset) if offset else None,
+    )
+
+
+if ciso8601 is not None:  # pragma: no cover
+    _parse_datetime = ciso8601.parse_datetime  # noqa: F811
+
+
+@lru_cache(maxsize=1024)
+def parse_date(value):
+    match = _date.match(value)
+    if match is None:
+        raise ValueError('{!r} is not an ISO 8601 date'.format(value))
+    return date(*map(int, match.groups()))
+
+
+@lru_cache(maxsize=256)
+def parse_datetime(value):
+    try:
+        return _parse_datetime(value)
+    except ValueError:
+        raise ValueError('{!r} is not an ISO 8601 datetime'.format(value))
+
+
+def convert_date(value):
+    if isinstance(value, str):
+        return parse_date(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def convert_datetime(value):
+    if isinstance(value, str):
+        return parse_datetime(value)
+    return value
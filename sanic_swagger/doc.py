@@ -1,14 +1,48 @@
 from collections import defaultdict
+from collections.abc import Mapping
+from datetime import date, datetime
 from enum import EnumMeta
 from functools import partial, singledispatch
 
 import attr
-
+from attr._make import _CountingAttr
+from sanic.response import HTTPResponse
+
+from .arrays import is_numeric_array
+from .binary import LazyBytes
+from .bodies import streaming_handler, structuring_handler
+from .caching import ResponseCache, caching_handler
+from .codegen import (
+    DispatchTable,
+    array_item_type,
+    optional_type,
+    union_types,
+)
+from .dates import convert_date, convert_datetime
+from .encoders import compile_encoder
 from .options import metadata_aliases
-from .validators import max_str_len, min_max_str_len, min_str_len
-
-
-def field(*args, **kwargs):
+from .streaming import stream_content_type, stream_response  # noqa
+from .structuring import compile_construct_unchecked, compile_from_dict
+from .validators import batched, compile_validator, validate_async  # noqa
+
+
+def field(*args, discriminator=None, async_validator=None, **kwargs):
+    """
+    Declares a field of a Model, taking its constraints as keywords.
+
+    The `discriminator` of a field typed as a Union of Models names the
+    property whose value tells which of them a payload is.
+
+    An `async_validator`, called like attrs validators but awaited, is run by
+    `validate_async` rather than on creation, for checks needing I/O. Those
+    decorated with `batched` are called once with every value to check.
+    """
+    for key, value in (
+        ('discriminator', discriminator),
+        ('async_validator', async_validator),
+    ):
+        if value is not None:
+            kwargs['metadata'] = {**(kwargs.get('metadata') or {}), key: value}
     for alias_group in metadata_aliases.values():
         for alias in alias_group:
             value = kwargs.pop(alias, None)
@@ -21,17 +55,46 @@ def field(*args, **kwargs):
 
 
 class ModelMeta(type):
-
-    def __new__(cls, name, bases, attrs):
+    """
+    Turns Models into attrs classes. Keywords given to the class, like
+    `slots`, `frozen` or `cache_hash`, are passed on to `attr.s`:
+
+        class Pet(doc.Model, slots=True, frozen=True):
+            ...
+    """
+
+    def __new__(cls, name, bases, attrs, **options):
+        if '__attrs_attrs__' in attrs:
+            # attr.s re-creating a slotted class, already wired
+            return super().__new__(cls, name, bases, attrs)
         if bases:
             for k, f in attrs.items():
                 annotations = attrs.get('__annotations__', {})
                 _implement_converter(f, k, annotations)
-                _implement_validators(f, k, annotations)
-        return attr.s(super().__new__(cls, name, bases, attrs))
+            if '__attrs_post_init__' in attrs:
+                attrs['__attrs_post_init__'] = _validating_post_init(
+                    attrs['__attrs_post_init__']
+                )
+        model = attr.s(super().__new__(cls, name, bases, attrs), **options)
+        model.__attrs_options__ = options
+        if bases:
+            # Checks the constraints of every field in one call
+            model.__validate__ = compile_validator(model) or _no_validation
+        # Needs no other Model, unlike the functions generated on first use
+        model.construct_unchecked = staticmethod(
+            compile_construct_unchecked(model)
+        )
+        return model
+
+    def __init__(cls, name, bases, attrs, **options):
+        super().__init__(name, bases, attrs)
 
 
 def _implement_converter(field, key, annotations):
+    if not isinstance(field, _CountingAttr):
+        return  # a plain class attribute, not a field
+    if field.converter is not None:
+        return  # declared on the field, which takes precedence
     if hasattr(field, 'type') and field.type:
         _converter(field.type, field)
     elif key in annotations:
@@ -40,10 +103,36 @@ def _implement_converter(field, key, annotations):
 
 @singledispatch
 def _converter(type_, field):
+    # Optional fields are converted as the type they hold
+    inner = optional_type(type_) or type_
     if attr.has(type_):
         field.converter = attr.converters.optional(
             partial(_model_converter, type_)
         )
+    elif is_numeric_array(inner):
+        field.converter = attr.converters.optional(inner.convert)
+    elif inner is bytes:
+        field.converter = LazyBytes.convert
+    elif inner is datetime:
+        field.converter = convert_datetime
+    elif inner is date:
+        field.converter = convert_date
+    elif field.metadata.get('discriminator'):
+        item_type = array_item_type(inner)
+        if union_types(type_):
+            table = DispatchTable(
+                field.metadata['discriminator'], union_types(type_)
+            )
+            field.converter = attr.converters.optional(
+                partial(_discriminated_converter, table)
+            )
+        elif item_type is not None and union_types(item_type):
+            table = DispatchTable(
+                field.metadata['discriminator'], union_types(item_type)
+            )
+            field.converter = attr.converters.optional(
+                partial(_discriminated_items_converter, table)
+            )
 
 
 @_converter.register(EnumMeta)
@@ -57,6 +146,19 @@ def _model_converter(model_cls, value):
     return model_cls(**value)
 
 
+def _discriminated_converter(table, value):
+    if isinstance(value, Mapping):
+        return _model_converter(table[value.get(table.property_name)], value)
+    return value
+
+
+def _discriminated_items_converter(table, values):
+    converted = [_discriminated_converter(table, value) for value in values]
+    if isinstance(values, list):
+        return converted
+    return type(values)(converted)
+
+
 @_converter.register(ModelMeta)
 def _converter_model_meta(type_, field):
     field.converter = attr.converters.optional(
@@ -64,41 +166,93 @@ def _converter_model_meta(type_, field):
     )
 
 
-def _implement_validators(field, key, annotations):
-    if hasattr(field, 'type') and field.type:
-        _implement_validator(field.type, field)
-    elif key in annotations:
-        _implement_validator(annotations.get(key), field)
+def _no_validation(self):
+    pass
 
 
-@singledispatch
-def _implement_validator(type_, field):
-    if type_ == str:
-        validator = None
-        if (
-            'min_length' in field.metadata
-            and 'max_length' not in field.metadata
-        ):
-            validator = min_str_len
-        elif (
-            'max_length' in field.metadata
-            and 'min_length' not in field.metadata
-        ):
-            validator = max_str_len
-        elif 'min_length' in field.metadata and 'max_length' in field.metadata:
-            validator = min_max_str_len
-        if validator is not None:
-            field.validator(validator)
-        # TODO implement patterns
-        # TODO implement format
-    # TODO number
-    #   (minimum, maximum, exclusive_minimum, exclusive_maximum, multiple_of)
-    # TODO array (one_of, min_items, max_items, unique_items)
-    # TODO object (min_properties, max_properties)
+def _validating_post_init(post_init):
+    def validate_then_post_init(self):
+        self.__validate__()
+        post_init(self)
+
+    return validate_then_post_init
 
 
 class Model(metaclass=ModelMeta):
-    pass
+    # Lets subclasses declared with `slots=True` do without a __dict__
+    __slots__ = ()
+
+    def __attrs_post_init__(self):
+        self.__validate__()
+
+    __validate__ = _no_validation
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Structures JSON-like `data` into an instance of this Model, converting
+        nested Models, enums and collections of them along the way.
+        """
+        return _generated(cls, '__structure__', compile_from_dict)(data)
+
+    @classmethod
+    def from_list(cls, items):
+        """
+        Structures every dict of `items` into an instance of this Model.
+        """
+        structure = _generated(cls, '__structure__', compile_from_dict)
+        return [structure(item) for item in items]
+
+    # construct_unchecked(*args, **kwargs) is generated by ModelMeta. It
+    # creates an instance from trusted values, like rows that were validated
+    # before being stored, assigning them as they are. Neither converters,
+    # validators nor `__attrs_post_init__` are run.
+
+    @classmethod
+    def construct_unchecked_list(cls, rows):
+        """
+        Like `construct_unchecked`, for every row of `rows`, each being a
+        mapping of field names or a tuple of fields in order.
+        """
+        construct = cls.construct_unchecked
+        return [
+            construct(**row) if isinstance(row, Mapping) else construct(*row)
+            for row in rows
+        ]
+
+    def to_json(self):
+        """
+        Encodes this Model into a JSON string, without unstructuring it into
+        a dict first.
+        """
+        return _generated(type(self), '__encode__', compile_encoder)(self)
+
+
+def _generated(cls, name, compile_):
+    # Generated on first use, once every nested Model exists, and cached on
+    # the class itself so that subclasses get their own
+    function = cls.__dict__.get(name)
+    if function is None:
+        function = compile_(cls)
+        setattr(cls, name, function)
+    return function
+
+
+def json_response(model_or_list, status=200, headers=None):
+    """
+    Returns a JSON response encoding a Model, or a list of Models, directly
+    into its body.
+    """
+    if isinstance(model_or_list, Model):
+        body = model_or_list.to_json()
+    else:
+        body = '[' + ','.join([item.to_json() for item in model_or_list]) + ']'
+    return HTTPResponse(
+        body,
+        status=status,
+        headers=headers,
+        content_type='application/json',
+    )
 
 
 # --------------------------------------------------------------- #
@@ -118,6 +272,7 @@ class RouteSpec:
     tags = None
     exclude = None
     responses = None
+    cache = None
 
     def __init__(self):
         self.tags = []
@@ -195,19 +350,53 @@ def description(text):
     return inner
 
 
-def consumes(*args, content_type=None, location='query', required=False):
+def consumes(
+    *args,
+    content_type=None,
+    location='query',
+    required=False,
+    offload_threshold=None,
+    stream=False,
+    chunk_size=None
+):
+    """
+    With an `offload_threshold`, the Model (or list of Models) consumed as
+    the body is structured and validated before calling the handler, which
+    gets it as its `body` argument. Bodies larger than the threshold, in
+    bytes, are handled in the `API_OFFLOAD_EXECUTOR` rather than the loop.
+
+    With `stream`, the handler of a route declared with `stream=True` gets
+    an async iterator of the Models of a JSON array or NDJSON body as it
+    arrives, one by one or in lists of up to `chunk_size`.
+    """
     def inner(func):
         if args:
             for arg in args:
                 field = RouteField(arg, location, required)
                 route_specs[func].consumes.append(field)
                 route_specs[func].consumes_content_type = content_type
-        return func
+        if offload_threshold is None and not stream:
+            return func
+        if location != 'body':
+            raise ValueError('Only bodies can be structured')
+        if stream:
+            handler = streaming_handler(func, args[0], chunk_size)
+        else:
+            handler = structuring_handler(func, args[0], offload_threshold)
+        route_specs[handler] = route_specs[func]
+        return handler
 
     return inner
 
 
-def produces(*args, content_type=None):
+def produces(*args, content_type=None, stream=None):
+    """
+    `stream`, 'array' or 'ndjson', declares the content type of responses
+    written with `stream_response` in that format.
+    """
+    if stream is not None and content_type is None:
+        content_type = [stream_content_type(stream)]
+
     def inner(func):
         if args:
             field = RouteField(args[0])
@@ -218,6 +407,23 @@ def produces(*args, content_type=None):
     return inner
 
 
+def cache(ttl, vary=(), max_entries=1024):
+    """
+    Caches the 200 responses of a GET route for `ttl` seconds, keyed by
+    path, query string and the request headers named in `vary`, keeping up
+    to `max_entries` of them. They're served with an ETag, answering
+    If-None-Match with a 304, and a matching Cache-Control.
+    """
+    def inner(func):
+        route_spec = route_specs[func]
+        route_spec.cache = ResponseCache(ttl, vary, max_entries)
+        handler = caching_handler(func, route_spec.cache)
+        route_specs[handler] = route_spec
+        return handler
+
+    return inner
+
+
 def tag(name):
     def inner(func):
         route_specs[func].tags.append(name)
@@ -0,0 +1,131 @@
+"""
+Generates functions encoding Models straight into JSON strings.
+
+Every field is encoded according to its type, without building the dict tree
+that `cattr.unstructure` would produce first.
+"""
+
+from datetime import date, time
+from enum import Enum
+
+import attr
+from sanic.response import json_dumps
+
+from .arrays import NumericArray, is_numeric_array
+from .binary import encode_bytes
+from .codegen import (
+    array_item_type,
+    compile_function,
+    mapping_value_type,
+    optional_type,
+    reference,
+)
+
+
+def encode_value(value):
+    """
+    Encodes a value whose type isn't known ahead of time.
+    """
+    if value is None:
+        return 'null'
+    if hasattr(value, 'to_json'):
+        return value.to_json()
+    if isinstance(value, Enum):
+        return encode_value(value.value)
+    if isinstance(value, (date, time)):
+        return '"' + value.isoformat() + '"'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return encode_bytes(value)
+    if isinstance(value, NumericArray):
+        return json_dumps(value.tolist())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return '[' + ','.join([encode_value(item) for item in value]) + ']'
+    if isinstance(value, dict):
+        return '{' + ','.join([
+            json_dumps(str(key)) + ':' + encode_value(item)
+            for key, item in value.items()
+        ]) + '}'
+    if attr.has(type(value)):
+        return '{' + ','.join([
+            json_dumps(field.name) + ':' +
+            encode_value(getattr(value, field.name))
+            for field in attr.fields(type(value))
+        ]) + '}'
+    return json_dumps(value)
+
+
+def _encode_expression(type_, value, namespace, depth=0):
+    """
+    Returns the expression encoding the variable `value`, of type `type_`,
+    into a JSON string.
+    """
+    inner = optional_type(type_)
+    if inner is not None:
+        type_ = inner
+
+    item = '_i{}'.format(depth)
+    if is_numeric_array(type_):
+        # Unpacked in C, then encoded in one call
+        expression = '_dumps({}.tolist())'.format(value)
+    elif array_item_type(type_) is not None:
+        expression = "'[' + ','.join([{} for {} in {}]) + ']'".format(
+            _encode_expression(
+                array_item_type(type_), item, namespace, depth + 1
+            ),
+            item,
+            value,
+        )
+    elif mapping_value_type(type_) is not None:
+        expression = (
+            "'{{' + ','.join([_dumps(str(_k{0})) + ':' + {1} "
+            "for _k{0}, {2} in {3}.items()]) + '}}'"
+        ).format(
+            depth,
+            _encode_expression(
+                mapping_value_type(type_), item, namespace, depth + 1
+            ),
+            item,
+            value,
+        )
+    elif type_ in (str, int, float, bool):
+        expression = '_dumps({})'.format(value)
+    elif not isinstance(type_, type):
+        expression = '_encode_value({})'.format(value)
+    elif issubclass(type_, Enum):
+        expression = '_dumps({}.value)'.format(value)
+    elif issubclass(type_, (date, time)):
+        expression = "'\"' + {}.isoformat() + '\"'".format(value)
+    elif issubclass(type_, (bytes, bytearray)):
+        expression = '_encode_bytes({})'.format(value)
+    elif hasattr(type_, 'to_json'):
+        # Subclasses of the declared Model use their own encoder
+        expression = '{}.to_json()'.format(value)
+    else:
+        expression = '_encode_value({})'.format(value)
+    return "('null' if {0} is None else {1})".format(value, expression)
+
+
+def compile_encoder(cls):
+    """
+    Generates the function encoding an instance of the Model `cls` into a
+    JSON string.
+    """
+    namespace = {
+        '_dumps': json_dumps,
+        '_encode_value': encode_value,
+        '_encode_bytes': encode_bytes,
+    }
+    lines = ['def to_json(self):']
+    parts = []
+    for index, attribute in enumerate(attr.fields(cls)):
+        lines.append('    value = self.{}'.format(attribute.name))
+        lines.append('    _{} = {}'.format(
+            index, _encode_expression(attribute.type, 'value', namespace)
+        ))
+        key = '{}{}:'.format(',' if index else '', json_dumps(attribute.name))
+        parts.append(reference(namespace, 'key', key))
+        parts.append('_{}'.format(index))
+    lines.append("    return ''.join(('{{', {}'}}'))".format(
+        ''.join(part + ', ' for part in parts)
+    ))
+    return compile_function('to_json', lines, namespace, cls)
@@ -1,17 +1,54 @@
+import asyncio
 import re
 from itertools import repeat
+from time import perf_counter
+from weakref import WeakKeyDictionary
 
 from sanic.blueprints import Blueprint
-from sanic.constants import HTTP_METHODS
-from sanic.response import json
+from sanic.exceptions import NotFound
+from sanic.log import logger
+from sanic.response import HTTPResponse, json
 from sanic.views import CompositionView
 
 from .doc import RouteSpec, route_specs
-from .serializer import object_definitions, serialize
+from .encoded import EncodedBody, default_brotli_quality, encoded_response
+from .serializer import SchemaRegistry, serialize
+from .shared import default_path as default_shared_path
+from .shared import remove as remove_shared
+from .shared import shared_body
+from .stats import BuildStats
 
 blueprint = Blueprint('openapi', url_prefix='openapi')
 
 _spec = {}
+_encoded_spec = None
+_spec_build = None
+_spec_refresh = None
+_spec_app = None
+# Bumped whenever routes are added or removed, and its value when the spec
+# was last built, so that the spec endpoint only compares two numbers
+_router_generations = WeakKeyDictionary()
+_spec_generation = None
+_path_specs = {}
+_schema_registries = WeakKeyDictionary()
+_build_stats = WeakKeyDictionary()
+
+
+# Sanic route parameters, <name> or <name:type>
+_path_parameter = re.compile(r'<([^:>]+)[^>]*>')
+
+
+class PathSpec:
+    handler = None
+    path = None
+    methods = None
+    tags = None
+
+    def __init__(self, handler, path=None, methods=None, tags=None):
+        self.handler = handler
+        self.path = path
+        self.methods = methods
+        self.tags = tags or []
 
 
 # Removes all null values from a dictionary
@@ -25,8 +62,211 @@ def remove_nulls(dictionary, deep=True):
 
 @blueprint.listener('before_server_start')
 def build_spec(app, loop):
-    _spec['swagger'] = '2.0'
-    _spec['info'] = {
+    global _encoded_spec, _spec_build, _spec_app, _spec_generation
+
+    _spec_app = None
+    _watch_router(app.router)
+    _spec_generation = _router_generations[app.router]
+    artifact = getattr(app.config, 'API_SPEC_ARTIFACT', None)
+    if artifact is not None:
+        # Prebuilt with `python -m sanic_swagger build`, nothing to generate
+        # nor compress, its variants are served when they were built
+        _spec_build = None
+        _publish_spec({}, EncodedBody.load(artifact, compress=False))
+    elif getattr(app.config, 'API_SPEC_SHARED', False):
+        # Built once by the first worker, served by all of them from an mmap
+        _spec_build = None
+        _publish_spec(
+            {},
+            shared_body(
+                _shared_spec_path(app), lambda: _compile_spec(app)[1]
+            ),
+        )
+    elif getattr(app.config, 'API_SPEC_ASYNC_BUILD', False):
+        # Build in an executor so the worker starts accepting traffic right
+        # away, the spec endpoint answers 503 (or waits) until it's done
+        _encoded_spec = None
+        _spec_app = app
+        _spec_build = loop.run_in_executor(
+            getattr(app.config, 'API_SPEC_EXECUTOR', None), _compile_spec, app
+        )
+        _spec_build.add_done_callback(_publish_spec_build)
+    else:
+        _spec_build = None
+        _spec_app = app
+        _publish_spec(*_compile_spec(app))
+
+
+def refresh_spec(app):
+    """
+    Documents the routes added, replaced or removed since the spec was built
+    and publishes the patched spec, returning whether anything changed.
+    """
+    global _spec_generation
+
+    generation = _router_generations.get(app.router)
+    if not _routes_changed(app):
+        _spec_generation = generation
+        return False
+    stats = BuildStats(detailed=_detailed_stats(app))
+    spec = _update_spec(app, stats)
+    start = perf_counter()
+    encoded = _encode_spec(app, spec)
+    stats.add(stats.phases, 'encode', perf_counter() - start)
+    _report_stats(app, stats)
+    _publish_spec(spec, encoded)
+    _spec_generation = generation
+    return True
+
+
+def _watch_router(router):
+    if router in _router_generations:
+        return
+    _router_generations[router] = 0
+
+    def counting(method):
+        def change_routes(*args, **kwargs):
+            _router_generations[router] += 1
+            return method(*args, **kwargs)
+
+        return change_routes
+
+    router.add = counting(router.add)
+    router.remove = counting(router.remove)
+
+
+def _routes_changed(app):
+    routes = app.router.routes_all
+    return len(routes) != len(_path_specs) or not all(
+        uri in _path_specs and _path_specs[uri].handler is route.handler
+        for uri, route in routes.items()
+    )
+
+
+def _refresh_spec_in_executor(app):
+    # One refresh at a time, which concurrent requests for the spec wait for
+    global _spec_refresh
+
+    if _spec_refresh is None or _spec_refresh.done():
+        _spec_refresh = asyncio.get_event_loop().run_in_executor(
+            getattr(app.config, 'API_SPEC_EXECUTOR', None), refresh_spec, app
+        )
+    return asyncio.shield(_spec_refresh)
+
+
+@blueprint.listener('after_server_stop')
+def remove_shared_spec(app, loop):
+    if getattr(app.config, 'API_SPEC_SHARED', False):
+        remove_shared(_shared_spec_path(app))
+
+
+def _shared_spec_path(app):
+    path = app.config.API_SPEC_SHARED
+    if path is True:
+        return default_shared_path(app)
+    return path
+
+
+def _compile_spec(app, compress=None):
+    stats = BuildStats(detailed=_detailed_stats(app))
+    spec = _build_spec(app, stats)
+    start = perf_counter()
+    encoded = _encode_spec(app, spec, compress)
+    stats.add(stats.phases, 'encode', perf_counter() - start)
+    _report_stats(app, stats)
+    return spec, encoded
+
+
+def build_stats(app):
+    """
+    The BuildStats of the last (full or incremental) build of `app`'s spec.
+    """
+    return _build_stats.get(app)
+
+
+def _detailed_stats(app):
+    # Timing every route and model is only worth it when someone looks
+    return any(
+        getattr(app.config, name, None)
+        for name in (
+            'API_SPEC_STATS_CALLBACK',
+            'API_SPEC_STATS_LOG',
+            'API_SPEC_STATS_ENDPOINT',
+        )
+    )
+
+
+def _report_stats(app, stats):
+    _build_stats[app] = stats
+    callback = getattr(app.config, 'API_SPEC_STATS_CALLBACK', None)
+    if callback is not None:
+        callback(app, stats)
+    if getattr(app.config, 'API_SPEC_STATS_LOG', False):
+        logger.info(stats.summary())
+
+
+def _publish_spec(spec, encoded):
+    global _encoded_spec
+
+    _spec.clear()
+    _spec.update(spec)
+    _encoded_spec = encoded
+
+
+def _publish_spec_build(future):
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        logger.error(
+            'Failed to build the OpenAPI spec', exc_info=future.exception()
+        )
+        return
+    _publish_spec(*future.result())
+
+
+def schema_registry(app):
+    """
+    The SchemaRegistry holding the definitions documented for `app`.
+    """
+    registry = _schema_registries.get(app)
+    if registry is None:
+        registry = SchemaRegistry(
+            getattr(app.config, 'API_SCHEMA_CACHE_SIZE', 4096)
+        )
+        _schema_registries[app] = registry
+    return registry
+
+
+def _build_spec(app, stats=None):
+    _path_specs.clear()
+    schema_registry(app).clear()
+    return _update_spec(app, stats)
+
+
+def _update_spec(app, stats=None):
+    """
+    Builds the spec, documenting only the routes that were added or changed
+    since the last build.
+    """
+    if stats is None:
+        stats = BuildStats(detailed=_detailed_stats(app))
+
+    registry = schema_registry(app)
+    registry.stats = stats if stats.detailed else None
+    cache_info = registry.cache.info()
+    try:
+        document = _assemble_spec(app, registry, stats)
+    finally:
+        registry.stats = None
+    stats.schemas = registry.cache.misses - cache_info.misses
+    stats.cache_hits = registry.cache.hits - cache_info.hits
+    return document
+
+
+def _assemble_spec(app, registry, stats):
+    document = {}
+    document['swagger'] = '2.0'
+    document['info'] = {
         'version': getattr(app.config, 'API_VERSION', '1.0.0'),
         'title': getattr(app.config, 'API_TITLE', 'API'),
         'description': getattr(app.config, 'API_DESCRIPTION', ''),
@@ -37,209 +277,289 @@ def build_spec(app, loop):
             'url': getattr(app.config, 'API_LICENSE_URL', None),
         },
     }
-    _spec['schemes'] = getattr(app.config, 'API_SCHEMES', ['http'])
+    document['schemes'] = getattr(app.config, 'API_SCHEMES', ['http'])
 
     host = getattr(app.config, 'API_HOST', None)
     if host is not None:
-        _spec['host'] = host
+        document['host'] = host
 
     base_path = getattr(app.config, 'API_BASEPATH', None)
     if base_path is not None:
-        _spec['basePath'] = base_path
+        document['basePath'] = base_path
 
     # --------------------------------------------------------------- #
     # Authorization
     # --------------------------------------------------------------- #
 
-    _spec['securityDefinitions'] = getattr(
+    document['securityDefinitions'] = getattr(
         app.config, 'API_SECURITY_DEFINITIONS', None
     )
-    _spec['security'] = getattr(app.config, 'API_SECURITY', None)
+    document['security'] = getattr(app.config, 'API_SECURITY', None)
+
+    routes = app.router.routes_all
+    for uri in [uri for uri in _path_specs if uri not in routes]:
+        del _path_specs[uri]
+
+    # One pass over the routes documents them, along with their blueprint
+    # and tags
+    paths = {}
+    tags = {}
+    start = perf_counter()
+    for uri, route in routes.items():
+        path_spec = _path_specs.get(uri)
+        if path_spec is None or path_spec.handler is not route.handler:
+            if stats.detailed:
+                route_start = perf_counter()
+                path_spec = _document_route(app, uri, route, registry, stats)
+                stats.add(stats.routes, uri, perf_counter() - route_start)
+            else:
+                path_spec = _document_route(app, uri, route, registry, stats)
+            _path_specs[uri] = path_spec
+        if path_spec.path is not None:
+            paths[path_spec.path] = path_spec.methods
+            for tag in path_spec.tags:
+                tags[tag] = True
+    stats.add(stats.phases, 'routes', perf_counter() - start)
+
+    # --------------------------------------------------------------- #
+    # Definitions
+    # --------------------------------------------------------------- #
+
+    start = perf_counter()
+    document['definitions'] = {}
+    document['definitions'].update(
+        {
+            str(key.__name__): definition
+            for key, definition in registry.definitions.items()
+        }
+    )
+    stats.add(stats.phases, 'definitions', perf_counter() - start)
 
     # --------------------------------------------------------------- #
-    # Blueprint Tags
+    # Tags
     # --------------------------------------------------------------- #
 
-    for blueprint in app.blueprints.values():
-        if hasattr(blueprint, 'routes'):
-            for route in blueprint.routes:
-                if hasattr(route.handler, 'view_class'):
-                    # class based view
-                    view = route.handler.view_class
-                    for http_method in HTTP_METHODS:
-                        _handler = getattr(view, http_method.lower(), None)
-                        if _handler:
-                            route_spec = route_specs[_handler]
-                            route_spec.blueprint = blueprint
-                            if not route_spec.tags:
-                                route_spec.tags.append(blueprint.name)
-                else:
-                    route_spec = route_specs[route.handler]
-                    route_spec.blueprint = blueprint
-                    if not route_spec.tags:
-                        route_spec.tags.append(blueprint.name)
+    start = perf_counter()
+    # TODO: figure out how to get descriptions in these
+    document['tags'] = [{'name': name} for name in tags.keys()]
+    stats.add(stats.phases, 'tags', perf_counter() - start)
+
+    document['paths'] = paths
 
-    paths = {}
-    for uri, route in app.router.routes_all.items():
-        if (
-            uri.startswith('/swagger')
-            or uri.startswith('/openapi')
-            or '<file_uri' in uri
-        ):
-            # TODO: add static flag in sanic routes
-            continue
+    return document
+
+
+def _document_route(app, uri, route, registry, stats):
+    if stats.detailed:
+        def _serialize(field):
+            with stats.phase('serialize'):
+                return serialize(field, registry=registry)
+    else:
+        def _serialize(field):
+            return serialize(field, registry=registry)
+
+    if (
+        uri.startswith('/swagger')
+        or uri.startswith('/openapi')
+        or '<file_uri' in uri
+    ):
+        # TODO: add static flag in sanic routes
+        return PathSpec(route.handler)
+
+    # --------------------------------------------------------------- #
+    # Methods
+    # --------------------------------------------------------------- #
 
-        # --------------------------------------------------------------- #
-        # Methods
-        # --------------------------------------------------------------- #
+    # Build list of methods and their handler functions
+    handler_type = type(route.handler)
+    if handler_type is CompositionView:
+        view = route.handler
+        method_handlers = view.handlers.items()
+    else:
+        method_handlers = zip(route.methods, repeat(route.handler))
+
+    # Sanic marks the handlers it registers from a blueprint
+    blueprint = app.blueprints.get(
+        getattr(route.handler, '__blueprintname__', None)
+    )
 
-        # Build list of methods and their handler functions
-        handler_type = type(route.handler)
-        if handler_type is CompositionView:
-            view = route.handler
-            method_handlers = view.handlers.items()
+    methods = {}
+    tags = {}
+    for _method, _handler in method_handlers:
+        # route_spec = route_specs.get(_handler) or RouteSpec()
+        if hasattr(_handler, 'view_class'):
+            view_handler = getattr(_handler.view_class, _method.lower())
+            route_spec = route_specs.get(view_handler) or RouteSpec()
         else:
-            method_handlers = zip(route.methods, repeat(route.handler))
-
-        methods = {}
-        for _method, _handler in method_handlers:
-            # route_spec = route_specs.get(_handler) or RouteSpec()
-            if hasattr(_handler, 'view_class'):
-                view_handler = getattr(_handler.view_class, _method.lower())
-                route_spec = route_specs.get(view_handler) or RouteSpec()
-            else:
-                route_spec = route_specs.get(_handler) or RouteSpec()
-
-            if _method == 'OPTIONS' or route_spec.exclude:
-                continue
-
-            consumes_content_types = (
-                route_spec.consumes_content_type
-                or getattr(
-                    app.config,
-                    'API_CONSUMES_CONTENT_TYPES',
-                    ['application/json'],
-                )
+            route_spec = route_specs.get(_handler) or RouteSpec()
+
+        if blueprint is not None:
+            route_spec.blueprint = blueprint
+            if not route_spec.tags:
+                route_spec.tags.append(blueprint.name)
+
+        if _method == 'OPTIONS' or route_spec.exclude:
+            continue
+
+        for tag in route_spec.tags:
+            tags[tag] = True
+
+        consumes_content_types = (
+            route_spec.consumes_content_type
+            or getattr(
+                app.config,
+                'API_CONSUMES_CONTENT_TYPES',
+                ['application/json'],
             )
-            produces_content_types = (
-                route_spec.produces_content_type
-                or getattr(
-                    app.config,
-                    'API_PRODUCES_CONTENT_TYPES',
-                    ['application/json'],
-                )
+        )
+        produces_content_types = (
+            route_spec.produces_content_type
+            or getattr(
+                app.config,
+                'API_PRODUCES_CONTENT_TYPES',
+                ['application/json'],
             )
+        )
 
-            # Parameters - Path & Query String
-            route_parameters = []
-            for parameter in route.parameters:
-                route_parameters.append(
-                    {
-                        **serialize(parameter.cast),
-                        'required': True,
-                        'in': 'path',
-                        'name': parameter.name,
-                    }
-                )
-
-            for consumer in route_spec.consumes:
-                spec = serialize(consumer.field)
-                if 'properties' in spec:
-                    for name, prop_spec in spec['properties'].items():
-                        route_param = {
-                            **prop_spec,
-                            'required': consumer.required,
-                            'in': consumer.location,
-                            'name': name,
-                        }
-                else:
+        # Parameters - Path & Query String
+        route_parameters = []
+        for parameter in route.parameters:
+            route_parameters.append(
+                {
+                    **_serialize(parameter.cast),
+                    'required': True,
+                    'in': 'path',
+                    'name': parameter.name,
+                }
+            )
+
+        for consumer in route_spec.consumes:
+            spec = _serialize(consumer.field)
+            if 'properties' in spec:
+                for name, prop_spec in spec['properties'].items():
                     route_param = {
-                        **spec,
+                        **prop_spec,
                         'required': consumer.required,
                         'in': consumer.location,
-                        'name': consumer.field.name
-                        if hasattr(consumer.field, 'name')
-                        else 'body',
+                        'name': name,
                     }
+            else:
+                route_param = {
+                    **spec,
+                    'required': consumer.required,
+                    'in': consumer.location,
+                    'name': consumer.field.name
+                    if hasattr(consumer.field, 'name')
+                    else 'body',
+                }
 
-                if '$ref' in route_param:
-                    route_param['schema'] = {'$ref': route_param['$ref']}
-                    del route_param['$ref']
-
-                route_parameters.append(route_param)
+            if '$ref' in route_param:
+                route_param['schema'] = {'$ref': route_param['$ref']}
+                del route_param['$ref']
+
+            route_parameters.append(route_param)
+
+        # Copied, so documenting the route again serializes the models
+        # into the current registry
+        responses = {}
+        for code, response in route_spec.responses.items():
+            response = dict(response)
+            model = response.pop('model', None)
+            if model is not None:
+                response['schema'] = _serialize(model)
+            responses[code] = response
+
+        if '200' not in responses:
+            responses['200'] = {
+                'description': 'successful operation',
+                'example': None,
+                'schema': _serialize(route_spec.produces.field)
+                if route_spec.produces
+                else None,
+            }
+
+        if route_spec.cache is not None and _method == 'GET':
+            responses['200'] = {
+                **responses['200'],
+                'headers': route_spec.cache.documented_headers(),
+            }
+            responses.setdefault(
+                '304', {'description': 'The cached response is still valid'}
+            )
 
-            if '200' not in route_spec.responses:
-                route_spec.responses['200'] = {
-                    'description': 'successful operation',
-                    'example': None,
-                    'schema': serialize(route_spec.produces.field)
-                    if route_spec.produces
-                    else None,
-                }
+        endpoint = {
+            'operationId': route_spec.operation or route.name,
+            'summary': route_spec.summary,
+            'description': route_spec.description,
+            'consumes': consumes_content_types,
+            'produces': produces_content_types,
+            'tags': route_spec.tags or None,
+            'parameters': route_parameters,
+            'responses': responses,
+        }
+        if stats.detailed:
+            with stats.phase('remove_nulls'):
+                endpoint = remove_nulls(endpoint)
+        else:
+            endpoint = remove_nulls(endpoint)
 
-            for k, v in route_spec.responses.items():
-                if v.get('model', None) is not None:
-                    schema = serialize(v.get('model'))
-                    route_spec.responses[k]['schema'] = schema
-                    del route_spec.responses[k]['model']
+        methods[_method.lower()] = endpoint
 
-            endpoint = remove_nulls(
-                {
-                    'operationId': route_spec.operation or route.name,
-                    'summary': route_spec.summary,
-                    'description': route_spec.description,
-                    'consumes': consumes_content_types,
-                    'produces': produces_content_types,
-                    'tags': route_spec.tags or None,
-                    'parameters': route_parameters,
-                    'responses': route_spec.responses,
-                }
-            )
+    if stats.detailed:
+        with stats.phase('path_templates'):
+            uri_parsed = _path_template(uri, route)
+    else:
+        uri_parsed = _path_template(uri, route)
 
-            methods[_method.lower()] = endpoint
+    return PathSpec(route.handler, uri_parsed, methods, list(tags))
 
-        uri_parsed = uri
-        for parameter in route.parameters:
-            uri_parsed = re.sub(
-                '<' + parameter.name + '.*?>',
-                '{' + parameter.name + '}',
-                uri_parsed,
-            )
 
-        paths[uri_parsed] = methods
+def _path_template(uri, route):
+    if route.parameters:
+        return _path_parameter.sub(r'{\1}', uri)
+    return uri
 
-    # --------------------------------------------------------------- #
-    # Definitions
-    # --------------------------------------------------------------- #
 
-    _spec['definitions'] = {}
-    _spec['definitions'].update(
-        {
-            str(key.__name__): definition
-            for key, definition in object_definitions.items()
-        }
+def _encode_spec(app, spec, compress=None):
+    if compress is None:
+        compress = getattr(app.config, 'API_SPEC_COMPRESS', True)
+    return EncodedBody.from_json(
+        spec, compress=compress, brotli_quality=_brotli_quality(app)
     )
 
-    # --------------------------------------------------------------- #
-    # Tags
-    # --------------------------------------------------------------- #
 
-    # TODO: figure out how to get descriptions in these
-    tags = {}
-    for route_spec in route_specs.values():
-        if route_spec.blueprint and route_spec.blueprint.name in (
-            'swagger',
-            'openapi',
-        ):
-            # TODO: add static flag in sanic routes
-            continue
-        for tag in route_spec.tags:
-            tags[tag] = True
-    _spec['tags'] = [{'name': name} for name in tags.keys()]
+def _brotli_quality(app):
+    return getattr(
+        app.config, 'API_SPEC_BROTLI_QUALITY', default_brotli_quality
+    )
 
-    _spec['paths'] = paths
+
+@blueprint.route('/_stats')
+def spec_stats(request):
+    if not getattr(request.app.config, 'API_SPEC_STATS_ENDPOINT', False):
+        raise NotFound('Requested URL {} not found'.format(request.path))
+    build = build_stats(request.app)
+    return json(build.as_dict() if build is not None else None)
 
 
 @blueprint.route('/spec.json')
-def spec(request):
-    return json(_spec)
+async def spec(request):
+    if (
+        _spec_app is request.app
+        and _encoded_spec is not None
+        and _router_generations.get(request.app.router) != _spec_generation
+    ):
+        # Routes were added, replaced or removed after the server started,
+        # documented and encoded again off the loop
+        await _refresh_spec_in_executor(request.app)
+
+    encoded = _encoded_spec
+    if encoded is None and _spec_build is not None:
+        config = request.app.config
+        if not getattr(config, 'API_SPEC_AWAIT_BUILD', False):
+            retry_after = getattr(config, 'API_SPEC_RETRY_AFTER', 1)
+            return HTTPResponse(
+                status=503, headers={'Retry-After': str(retry_after)}
+            )
+        _, encoded = await asyncio.shield(_spec_build)
+    return encoded_response(request, encoded)
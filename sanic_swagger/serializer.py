@@ -1,6 +1,8 @@
+from collections import OrderedDict, namedtuple
 from datetime import date, datetime
 from enum import EnumMeta
 from functools import singledispatch
+from time import perf_counter
 from typing import (
     Any,
     Collection,
@@ -16,28 +18,160 @@ from typing import (
 
 import attr
 
+from .arrays import is_numeric_array
+from .codegen import (
+    DispatchTable,
+    array_item_type,
+    optional_type,
+    union_types,
+)
 from .doc import ModelMeta
 from .options import metadata_aliases
 
-required_fields = {}
-object_definitions = {}
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class SchemaCache:
+    """
+    A bounded LRU of serialized schemas, keyed by type, field metadata and
+    model, so that types referenced over and over are only serialized once.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, type_):
+        for key in [key for key in self._entries if key[0] is type_]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return CacheInfo(
+            self.hits, self.misses, self.maxsize, len(self._entries)
+        )
+
+
+class SchemaRegistry:
+    """
+    The definitions, required fields and cached schemas generated for one
+    spec. Serializing the same models again doesn't grow it, and `clear`
+    resets it before a full rebuild.
+    """
+
+    def __init__(self, cache_size=4096):
+        self.definitions = {}
+        self.required_fields = {}
+        self.cache = SchemaCache(cache_size)
+        # The BuildStats of the build in progress, if any
+        self.stats = None
+
+    def add_required_field(self, model, name):
+        fields = self.required_fields.setdefault(model, [])
+        if name not in fields:
+            fields.append(name)
+
+    def clear(self):
+        self.definitions.clear()
+        self.required_fields.clear()
+        self.cache.clear()
+
+
+# Used when serializing without a registry, e.g. outside of an app
+default_registry = SchemaRegistry()
+object_definitions = default_registry.definitions
+required_fields = default_registry.required_fields
+schema_cache = default_registry.cache
+
 
+def serialize(field, model=None, registry=None):
+    if registry is None:
+        registry = default_registry
+
+    key = _cache_key(field, model)
+    if key is not None:
+        entry = registry.cache.get(key)
+        if entry is not None:
+            schema, required = entry
+            if required and model is not None:
+                registry.add_required_field(model, field.name)
+            return dict(schema)
 
-def serialize(field, model=None):
     if hasattr(field, 'type'):
-        return _merge_metadata(
-            _serialize_type(field.type, model), field, model
+        schema = _merge_metadata(
+            _serialize_type(field.type, model, registry), field, model
         )
+        required = bool(schema.get('required', False))
+        if required:
+            del schema['required']
+            if model is not None:
+                registry.add_required_field(model, field.name)
     else:
-        return _serialize_type(field, model)
+        schema, required = _serialize_type(field, model, registry), False
+
+    if key is not None:
+        registry.cache.put(key, (dict(schema), required))
+    return schema
+
+
+def _cache_key(field, model):
+    try:
+        if hasattr(field, 'type'):
+            key = (field.type, _freeze(field.metadata), model)
+        else:
+            key = (field, None, model)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
 
 
 def _create_definition(func):
-    def wrapper(type_, model):
+    def wrapper(type_, model, registry=None):
+        if registry is None:
+            registry = default_registry
         # if model is None:
         #     return func(type_, model)
-        output = func(type_, model)
-        object_definitions[type_] = output
+        stats = registry.stats
+        if stats is None:
+            output = func(type_, model, registry)
+        else:
+            start = perf_counter()
+            output = func(type_, model, registry)
+            stats.add(stats.models, type_.__name__, perf_counter() - start)
+        registry.definitions[type_] = output
         return {
             'type': output.get('type'),
             'format': output.get('format', None),
@@ -66,6 +200,9 @@ def _raise_other_encouraged_type_exception(simple_type, *encouraged_type):
 
 
 def _merge_metadata(data, field, model):
+    if 'discriminator' in field.metadata:
+        _add_discriminator(data, field.type, field.metadata['discriminator'])
+
     if data.get('type', None) is None:
         return data
 
@@ -78,54 +215,76 @@ def _merge_metadata(data, field, model):
             if key in field.metadata:
                 data[_camel_case(key)] = field.metadata.get(key)
 
-    if data.get('required', False):
-        del data['required']
-        if model is not None:
-            if model in required_fields:
-                required_fields[model].append(field.name)
-            else:
-                required_fields[model] = [field.name]
+    if is_numeric_array(optional_type(field.type) or field.type):
+        # Number constraints apply to every item
+        for key in metadata_aliases['number']:
+            if key in field.metadata:
+                data['items'][_camel_case(key)] = field.metadata.get(key)
+
     return data
 
 
+def _add_discriminator(data, type_, property_name):
+    # Lists of a Union carry the discriminator on their items
+    if array_item_type(type_) is not None and 'items' in data:
+        return _add_discriminator(
+            data['items'], array_item_type(type_), property_name
+        )
+    types = union_types(type_)
+    if types is not None and 'oneOf' in data:
+        table = DispatchTable(property_name, types)
+        data['discriminator'] = {
+            'propertyName': property_name,
+            'mapping': {
+                str(value): '#/definitions/{}'.format(model.__name__)
+                for value, model in table.items()
+            },
+        }
+
+
 @singledispatch
-def _serialize_type(type_, model):
+def _serialize_type(type_, model, registry=None):
     if type_ == Any:
         return {'type': 'object'}  # TODO is this the best way to deal with?
     elif type_.__origin__ == Union:
         if len(type_.__args__) == 2 and type(None) == type_.__args__[1]:
-            output = _serialize_type(type_.__args__[0], model)
+            output = _serialize_type(type_.__args__[0], model, registry)
             output.update({'nullable': True})
             return output
         else:
             return {
                 'oneOf': [
-                    _serialize_type(arg, model) for arg in type_.__args__
+                    _serialize_type(arg, model, registry)
+                    for arg in type_.__args__
                 ]
             }
 
 
 @_serialize_type.register(EnumMeta)  # for enums
 @_create_definition
-def _serialize_enum_meta(type_, model):
+def _serialize_enum_meta(type_, model, registry=None):
     """
     Note: Remember that this function is decorated with _create_definition.
           So its outputs when calling this function are those of the wrapped
           output.
     """
     choices = [e.value for e in type_]
-    output = _serialize_type(type(choices[0]), model)
+    output = _serialize_type(type(choices[0]), model, registry)
     output.update({'enum': choices})
     return output
 
 
 @_serialize_type.register(GenericMeta)  # for typing generics
-def _serialize_generic_meta(type_, model):
+def _serialize_generic_meta(type_, model, registry=None):
     if type_.__base__ in (List, Set, Sequence, Collection, Iterable):
         output = {'type': 'array'}
         if len(type_.__args__):
             output.update(
-                {'items': {**_serialize_type(type_.__args__[0], model)}}
+                {
+                    'items': {
+                        **_serialize_type(type_.__args__[0], model, registry)
+                    }
+                }
             )
         return output
     elif type_.__base__ in (Dict, Mapping):
@@ -134,8 +293,12 @@ def _serialize_generic_meta(type_, model):
             output.update(
                 {
                     'properties': {
-                        'key': _serialize_type(type_.__args__[0], model),
-                        'value': _serialize_type(type_.__args__[1], model),
+                        'key': _serialize_type(
+                            type_.__args__[0], model, registry
+                        ),
+                        'value': _serialize_type(
+                            type_.__args__[1], model, registry
+                        ),
                     }
                 }
             )
@@ -146,7 +309,7 @@ def _serialize_generic_meta(type_, model):
 
 @_serialize_type.register(ModelMeta)  # for recursive types
 @_create_definition
-def _serialize_custom_objects(type_, model):
+def _serialize_custom_objects(type_, model, registry=None):
     """
     Note: Remember that this function is decorated with _create_definition.
           So its outputs when calling this function are those of the wrapped
@@ -155,17 +318,17 @@ def _serialize_custom_objects(type_, model):
     output = {
         'type': 'object',
         'properties': {
-            str(field.name): serialize(field, type_)
+            str(field.name): serialize(field, type_, registry)
             for field in attr.fields(type_)
         },
     }
-    if model is None and type_ in required_fields:
-        output.update({'required': required_fields[type_]})
+    if model is None and type_ in registry.required_fields:
+        output.update({'required': registry.required_fields[type_]})
     return output
 
 
 @_serialize_type.register(type)
-def _serialize_raw_type_information(type_, model):
+def _serialize_raw_type_information(type_, model, registry=None):
     if type_ == int:
         return {'type': 'integer', 'format': 'int64'}
     elif type_ == float:
@@ -180,6 +343,11 @@ def _serialize_raw_type_information(type_, model):
         return {'type': 'string', 'format': 'date-time'}
     elif type_ == bytes:
         return {'type': 'string', 'format': 'byte'}
+    elif is_numeric_array(type_):
+        return {
+            'type': 'array',
+            'items': _serialize_type(type_.item_type, model, registry),
+        }
     elif type_ in (list, set, tuple):
         _raise_other_encouraged_type_exception(type_, Collection, Iterable,
                                                List, Sequence, Set)
@@ -187,5 +355,7 @@ def _serialize_raw_type_information(type_, model):
         _raise_other_encouraged_type_exception(type_, Dict, Mapping)
     else:
         if attr.has(type_):  # for recursive types, just like ModelMeta
-            return _create_definition(_serialize_custom_objects)(type_, model)
+            return _create_definition(_serialize_custom_objects)(
+                type_, model, registry
+            )
         raise TypeError('This type is not supported')
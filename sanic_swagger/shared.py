@@ -0,0 +1,81 @@
+"""
+Shares one encoded spec between the worker processes of an app.
+
+The first worker to get the lock builds and writes the spec, every worker
+(that one included) then serves it from a read-only mmap of the file, so the
+spec is generated once per host and its pages are shared between workers.
+"""
+
+import os
+import tempfile
+from uuid import uuid4
+
+from .encoded import EncodedBody
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# Minted on import, before Sanic forks the workers, so that they agree on it
+# while other runs (another app, or the next deploy) don't
+run_id = uuid4().hex
+
+_suffixes = ('', '.gz', '.br')
+
+
+def default_path(app):
+    return os.path.join(
+        tempfile.gettempdir(),
+        'sanic-swagger-{}-{}.json'.format(app.name, run_id),
+    )
+
+
+def shared_body(path, build):
+    """
+    Returns the EncodedBody stored at `path`, calling `build` to create it
+    if no other process of this run did already. Files left behind by other
+    runs are built again.
+    """
+    if fcntl is None:
+        return build()
+
+    with open(path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if _read_run_id(path) != run_id:
+                _save(build(), path)
+            return EncodedBody.load(path, compress=False, mapped=True)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_run_id(path):
+    try:
+        with open(path + '.id') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _save(encoded, path):
+    # Replaced rather than overwritten, so that processes still serving a
+    # previous mmap of them keep their pages
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    encoded.save(temporary)
+    for suffix in _suffixes:
+        if os.path.exists(temporary + suffix):
+            os.replace(temporary + suffix, path + suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    with open(temporary + '.id', 'w') as f:
+        f.write(run_id)
+    os.replace(temporary + '.id', path + '.id')
+
+
+def remove(path):
+    for suffix in _suffixes + ('.id', '.lock'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
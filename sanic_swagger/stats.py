@@ -0,0 +1,75 @@
+"""
+Timings and counts collected while building a spec.
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+
+# Phases that don't overlap, and add up to the whole build
+_top_level_phases = ('routes', 'definitions', 'tags', 'encode')
+
+
+class BuildStats:
+    """
+    Phases are timed separately and may nest, e.g. `serialize`,
+    `path_templates` and `remove_nulls` are part of `routes`. Model timings
+    include the models nested in them.
+
+    Unless `detailed`, only the top-level phases are timed: timing every
+    route, model and serialized field costs about a third of the build.
+    """
+
+    detailed = True
+    phases = None
+    routes = None
+    models = None
+    schemas = 0
+    cache_hits = 0
+
+    def __init__(self, detailed=True):
+        self.detailed = detailed
+        self.phases = {}
+        self.routes = {}
+        self.models = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(self.phases, name, perf_counter() - start)
+
+    @staticmethod
+    def add(timings, key, seconds):
+        timings[key] = timings.get(key, 0.0) + seconds
+
+    @property
+    def total(self):
+        return sum(self.phases.get(name, 0.0) for name in _top_level_phases)
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'phases': self.phases,
+            'routes': self.routes,
+            'models': self.models,
+            'schemas': self.schemas,
+            'cache_hits': self.cache_hits,
+        }
+
+    def summary(self):
+        phases = ', '.join(
+            '{} {:.3f}s'.format(name, seconds)
+            for name, seconds in self.phases.items()
+        )
+        return (
+            'Built the OpenAPI spec in {:.3f}s ({}), {} routes, '
+            '{} schemas generated, {} cache hits'.format(
+                self.total,
+                phases,
+                len(self.routes),
+                self.schemas,
+                self.cache_hits,
+            )
+        )
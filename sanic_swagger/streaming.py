@@ -0,0 +1,319 @@
+"""
+Request and response bodies holding many items.
+
+Decoders are fed the chunks of a body as they arrive and return the items
+completed so far, so that only the item being received is buffered.
+Responses are written item by item as the handler produces them.
+"""
+
+import codecs
+import json
+import re
+
+from sanic.request import json_loads
+from sanic.response import stream
+
+from .binary import LazyBytes, iter_base64
+from .encoders import encode_value
+
+# Items larger than this are rejected rather than buffered indefinitely
+default_max_item_size = 2 ** 20
+
+_whitespace = ' \t\n\r'
+
+# The rest of a string, up to its closing quote or the end of the chunk
+_string_rest = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+# Anything up to the next bracket, complete strings included, so that only
+# brackets and strings split across chunks are handled one by one
+_unnested = re.compile(
+    r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL
+)
+# Numbers, true, false and null end at the next delimiter
+_scalar_end = re.compile(r'[ \t\n\r,\]]')
+
+
+class JSONArrayDecoder:
+    """
+    Decodes the items of a JSON array.
+
+    The item being received is scanned once, keeping track of its strings
+    and nesting across chunks, and only parsed once it's complete.
+    """
+
+    def __init__(self, max_item_size=default_max_item_size):
+        self.max_item_size = max_item_size
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        # One of '[', 'first', 'item', 'value' (being received),
+        # 'separator' or 'end', what comes next
+        self._expected = '['
+        self._parts = []
+        self._size = 0
+        self._depth = 0
+        self._scalar = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk, final=False):
+        text = self._text.decode(chunk, final)
+        items = []
+        position = 0
+        length = len(text)
+        while position < length:
+            expected = self._expected
+            if expected == 'value':
+                end = self._scan(text, position)
+                self._keep(text[position:end])
+                if end is None:
+                    break  # needs more data
+                items.append(self._decode_item())
+                self._expected = 'separator'
+                position = end
+                continue
+            char = text[position]
+            if char in _whitespace:
+                position += 1
+            elif expected == 'end':
+                raise ValueError('Unexpected data after the JSON array')
+            elif expected == '[':
+                if char != '[':
+                    raise ValueError('The body must be a JSON array')
+                self._expected = 'first'
+                position += 1
+            elif expected == 'separator' or (
+                expected == 'first' and char == ']'
+            ):
+                if char == ']':
+                    self._expected = 'end'
+                elif char == ',' and expected == 'separator':
+                    self._expected = 'item'
+                else:
+                    raise ValueError(
+                        'Expected , or ] at {!r}'.format(
+                            text[position:position + 20]
+                        )
+                    )
+                position += 1
+            else:
+                self._expected = 'value'
+                self._scalar = char not in '{["'
+                if char == '"':
+                    # Scanned as a string, which ends the item
+                    self._in_string = True
+                    self._keep(char)
+                    position += 1
+        if final and self._expected != 'end':
+            raise ValueError('The JSON array is incomplete')
+        return items
+
+    def close(self):
+        return self.feed(b'', final=True)
+
+    def _scan(self, text, position):
+        """
+        Returns where the item being received ends in `text`, scanning from
+        `position`, or None if it goes on in the next chunk.
+        """
+        if self._scalar:
+            match = _scalar_end.search(text, position)
+            return None if match is None else match.start()
+        while True:
+            if self._escaped:
+                if position == len(text):
+                    return None
+                self._escaped = False
+                position += 1
+            if self._in_string:
+                position = _string_rest.match(text, position).end()
+                if position == len(text):
+                    return None
+                if text[position] == '\\':
+                    # Escaping the first character of the next chunk
+                    self._escaped = True
+                    return None
+                position += 1
+                self._in_string = False
+                if self._depth == 0:
+                    return position  # the item is a string
+            else:
+                position = _unnested.match(text, position).end()
+                if position == len(text):
+                    return None
+                char = text[position]
+                position += 1
+                if char == '"':
+                    self._in_string = True
+                elif char in '[{':
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth <= 0:
+                        return position
+
+    def _keep(self, text):
+        self._size += len(text)
+        if self._size > self.max_item_size:
+            raise ValueError(
+                'Items must be at most {} characters long'.format(
+                    self.max_item_size
+                )
+            )
+        self._parts.append(text)
+
+    def _decode_item(self):
+        text = ''.join(self._parts)
+        self._parts = []
+        self._size = 0
+        self._depth = 0
+        return self._decoder.decode(text)
+
+
+class NDJSONDecoder:
+    """
+    Decodes newline delimited JSON, one item per line.
+    """
+
+    def __init__(self, max_item_size=default_max_item_size):
+        self.max_item_size = max_item_size
+        # The line being received, in the chunks it came in
+        self._parts = []
+        self._size = 0
+
+    def feed(self, chunk, final=False):
+        if b'\n' not in chunk and not final:
+            self._size += len(chunk)
+            if self._size > self.max_item_size:
+                raise ValueError('NDJSON line too long')
+            self._parts.append(chunk)
+            return []
+        self._parts.append(chunk)
+        lines = b''.join(self._parts).split(b'\n')
+        last = b'' if final else lines.pop()
+        self._parts = [last]
+        self._size = len(last)
+        if self._size > self.max_item_size:
+            raise ValueError('NDJSON line too long')
+        return [json_loads(line) for line in lines if line.strip()]
+
+    def close(self):
+        return self.feed(b'', final=True)
+
+
+ndjson_content_types = frozenset(
+    ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+)
+
+
+def decoder_for(content_type, max_item_size=default_max_item_size):
+    """
+    Returns the decoder of bodies of `content_type`, NDJSON ones or otherwise
+    JSON arrays.
+    """
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type in ndjson_content_types:
+        return NDJSONDecoder(max_item_size)
+    return JSONArrayDecoder(max_item_size)
+
+
+async def iter_body_chunks(request):
+    """
+    Yields the chunks of the body of a request, as they arrive on routes
+    declared with `stream=True`, or at once otherwise.
+    """
+    if request.stream is None:
+        yield request.body
+        return
+    while True:
+        chunk = await request.stream.get()
+        if chunk is None:
+            return
+        yield chunk
+
+
+stream_content_types = {
+    'array': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Items are written once they add up to this many characters, rather than
+# one chunk per item
+_write_size = 2 ** 16
+
+_binary_types = (bytes, bytearray, memoryview, LazyBytes)
+
+
+def stream_content_type(kind):
+    """
+    Returns the content type of streamed responses of `kind`, 'array' or
+    'ndjson'.
+    """
+    if kind not in stream_content_types:
+        raise ValueError(
+            'The kind must be one of {}, not {!r}'.format(
+                ', '.join(stream_content_types), kind
+            )
+        )
+    return stream_content_types[kind]
+
+
+def stream_response(items, kind='array', status=200, headers=None):
+    """
+    Returns a response writing `items`, an iterable or async iterable of
+    Models, as a JSON array or NDJSON (`kind='ndjson'`) while they're
+    produced. Each write waits for the client to keep up with the previous
+    ones.
+
+    Bytes-like items are written as base64 strings, chunk by chunk, so that
+    large values are never encoded all at once.
+    """
+    content_type = stream_content_type(kind)
+    array = kind == 'array'
+
+    async def write_items(response):
+        parts = ['['] if array else []
+        size = 0
+        separator = ''
+        async for item in _iterate(items):
+            if array:
+                parts.append(separator)
+                separator = ','
+            if isinstance(item, _binary_types):
+                parts.append('"')
+                for chunk in iter_base64(item):
+                    parts.append(chunk.decode('ascii'))
+                    size += len(chunk)
+                    if size >= _write_size:
+                        await response.write(''.join(parts))
+                        parts = []
+                        size = 0
+                parts.append('"')
+            else:
+                encoded = encode_value(item)
+                parts.append(encoded)
+                size += len(encoded)
+            if not array:
+                parts.append('\n')
+            if size >= _write_size:
+                await response.write(''.join(parts))
+                parts = []
+                size = 0
+        if array:
+            parts.append(']')
+        if parts:
+            await response.write(''.join(parts))
+
+    return stream(
+        write_items,
+        status=status,
+        headers=headers,
+        content_type=content_type,
+    )
+
+
+async def _iterate(items):
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,274 @@
+"""
+Generates functions structuring JSON-like data into Models.
+
+Every field is converted inline, according to its type, instead of going
+through the chain of attrs converters installed by ModelMeta.
+"""
+
+from collections.abc import Mapping
+from enum import Enum
+from typing import Set
+
+import attr
+
+from .arrays import is_numeric_array
+from .codegen import (
+    DispatchTable,
+    array_item_type,
+    compile_function,
+    mapping_value_type,
+    optional_type,
+    reference,
+    union_types,
+)
+
+
+def _missing(cls, name):
+    raise TypeError(
+        "{}.from_dict() missing required field '{}'".format(
+            cls.__name__, name
+        )
+    )
+
+
+def _not_a_mapping(cls, data):
+    raise TypeError(
+        '{}.from_dict() expected an object, got {}'.format(
+            cls.__name__, type(data).__name__
+        )
+    )
+
+
+def _items(value):
+    try:
+        return value.items()
+    except AttributeError:
+        raise TypeError(
+            'Expected an object, got {}'.format(type(value).__name__)
+        )
+
+
+def _structure_expression(
+    type_, value, namespace, depth=0, discriminator=None
+):
+    """
+    Returns the expression converting the variable `value` into `type_`, or
+    None if it needs no conversion. Unions of Models are dispatched on the
+    value of their `discriminator` property.
+    """
+    inner = optional_type(type_)
+    if inner is not None:
+        type_ = inner
+
+    item = '_i{}'.format(depth)
+    if discriminator is not None and union_types(type_):
+        table = DispatchTable(discriminator, union_types(type_))
+        constructor = '.from_dict({0})' if all(
+            hasattr(model, 'from_dict') for model in table.values()
+        ) else '(**{0})'
+        expression = (
+            '{0} if not isinstance({0}, dict) else '
+            '{1}[{0}.get({2!r})]' + constructor
+        ).format(value, reference(namespace, 'dispatch', table), discriminator)
+    elif isinstance(type_, type) and attr.has(type_):
+        model = reference(namespace, 'model', type_)
+        if hasattr(type_, 'from_dict'):
+            expression = '{0} if isinstance({0}, {1}) else {1}.from_dict({0})'
+        else:
+            expression = '{0} if isinstance({0}, {1}) else {1}(**{0})'
+        expression = expression.format(value, model)
+    elif is_numeric_array(type_):
+        expression = '{}.convert({})'.format(
+            reference(namespace, 'array', type_), value
+        )
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        expression = '{}({})'.format(
+            reference(namespace, 'enum', type_), value
+        )
+    elif array_item_type(type_) is not None:
+        converted = _structure_expression(
+            array_item_type(type_), item, namespace, depth + 1, discriminator
+        )
+        if converted is None:
+            return None
+        brackets = '{{{}}}' if type_.__base__ is Set else '[{}]'
+        expression = brackets.format(
+            '{} for {} in {}'.format(converted, item, value)
+        )
+    elif mapping_value_type(type_) is not None:
+        converted = _structure_expression(
+            mapping_value_type(type_),
+            item,
+            namespace,
+            depth + 1,
+            discriminator,
+        )
+        if converted is None:
+            return None
+        namespace['_items'] = _items
+        expression = (
+            '{{_k{0}: {1} for _k{0}, {2} in _items({3})}}'.format(
+                depth, converted, item, value
+            )
+        )
+    else:
+        return None
+    return '(None if {0} is None else {1})'.format(value, expression)
+
+
+def _default_lines(attribute, namespace):
+    default = attribute.default
+    if isinstance(default, attr.Factory):
+        factory = reference(namespace, 'factory', default.factory)
+        if default.takes_self:
+            return ['value = {}(self)'.format(factory)]
+        return ['value = {}()'.format(factory)]
+    return ['value = {}'.format(reference(namespace, 'default', default))]
+
+
+def _assignment(cls, namespace):
+    """
+    Returns the format of the lines assigning to the fields of `self`,
+    which go through object.__setattr__ for frozen Models like attrs'
+    __init__ does.
+    """
+    if cls.__setattr__ is object.__setattr__:
+        return 'self.{} = {}'
+    namespace['_setattr'] = object.__setattr__
+    return "_setattr(self, '{}', {})"
+
+
+def _new_instance_lines(cls, namespace):
+    """
+    Returns the lines creating `self` without going through __init__.
+    """
+    namespace['_cls'] = cls
+    namespace['_new'] = object.__new__
+    lines = ['self = _new(_cls)']
+    if cls.__dict__.get('__attrs_options__', {}).get('cache_hash'):
+        lines.append(_assignment(cls, namespace).format(
+            '_attrs_cached_hash', 'None'
+        ))
+    return lines
+
+
+def compile_from_dict(cls):
+    """
+    Generates the function structuring a dict into an instance of the
+    Model `cls`. Keys that aren't fields are ignored. Like __init__, the
+    attrs validators of the fields are run once they're all assigned.
+    """
+    namespace = {
+        '_missing': _missing,
+        '_not_a_mapping': _not_a_mapping,
+        '_Mapping': Mapping,
+        '_NOTHING': attr.NOTHING,
+    }
+    lines = [
+        'def from_dict(data):',
+        '    if isinstance(data, _cls):',
+        '        return data',
+        '    if type(data) is not dict and not isinstance(data, _Mapping):',
+        '        _not_a_mapping(_cls, data)',
+    ]
+    lines.extend(
+        '    ' + line for line in _new_instance_lines(cls, namespace)
+    )
+    assignment = '    ' + _assignment(cls, namespace)
+    for attribute in attr.fields(cls):
+        name = attribute.name
+        if not attribute.init:
+            if attribute.default is not attr.NOTHING:
+                lines.extend('    ' + line for line in _default_lines(
+                    attribute, namespace
+                ))
+                lines.append(assignment.format(name, 'value'))
+            continue
+
+        lines.append('    value = data.get({!r}, _NOTHING)'.format(name))
+        lines.append('    if value is _NOTHING:')
+        if attribute.default is attr.NOTHING:
+            lines.append('        _missing(_cls, {!r})'.format(name))
+        else:
+            lines.extend('        ' + line for line in _default_lines(
+                attribute, namespace
+            ))
+
+        expression = _structure_expression(
+            attribute.type,
+            'value',
+            namespace,
+            discriminator=attribute.metadata.get('discriminator'),
+        )
+        if expression is None and attribute.converter is not None:
+            expression = '{}(value)'.format(
+                reference(namespace, 'converter', attribute.converter)
+            )
+        lines.append(assignment.format(name, expression or 'value'))
+
+    validated = [a for a in attr.fields(cls) if a.validator is not None]
+    if validated:
+        namespace['_run_validators'] = attr.get_run_validators
+        lines.append('    if _run_validators():')
+        for attribute in validated:
+            lines.append('        {}(self, {}, self.{})'.format(
+                reference(namespace, 'validator', attribute.validator),
+                reference(namespace, 'attribute', attribute),
+                attribute.name,
+            ))
+
+    lines.append('    self.__attrs_post_init__()')
+    lines.append('    return self')
+    return compile_function('from_dict', lines, namespace, cls)
+
+
+def compile_construct_unchecked(cls):
+    """
+    Generates the function creating an instance of the Model `cls` from its
+    fields, as its __init__ would, without converting nor validating them.
+    """
+    namespace = {'_NOTHING': attr.NOTHING}
+    parameters = []
+    keyword_only = []
+    lines = ['    ' + line for line in _new_instance_lines(cls, namespace)]
+    assignment = '    ' + _assignment(cls, namespace)
+    for attribute in attr.fields(cls):
+        name = attribute.name
+        if not attribute.init:
+            if attribute.default is not attr.NOTHING:
+                lines.extend('    ' + line for line in _default_lines(
+                    attribute, namespace
+                ))
+                lines.append(assignment.format(name, 'value'))
+            continue
+
+        # Like attrs, private fields are passed without their underscore
+        argument = name.lstrip('_')
+        default = attribute.default
+        if default is attr.NOTHING:
+            parameter = argument
+        elif isinstance(default, attr.Factory):
+            parameter = argument + '=_NOTHING'
+            lines.append('    if {} is _NOTHING:'.format(argument))
+            lines.extend('        ' + line for line in _default_lines(
+                attribute, namespace
+            ))
+            lines.append('        {} = value'.format(argument))
+        else:
+            parameter = '{}={}'.format(
+                argument, reference(namespace, 'default', default)
+            )
+        if getattr(attribute, 'kw_only', False):
+            keyword_only.append(parameter)
+        else:
+            parameters.append(parameter)
+        lines.append(assignment.format(name, argument))
+
+    if keyword_only:
+        parameters.append('*')
+        parameters.extend(keyword_only)
+    lines.insert(0, 'def construct_unchecked({}):'.format(
+        ', '.join(parameters)
+    ))
+    lines.append('    return self')
+    return compile_function('construct_unchecked', lines, namespace, cls)
@@ -1,8 +1,28 @@
+import asyncio
+import re
+from functools import update_wrapper
+from ipaddress import ip_address
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import attr
+
+from .arrays import is_numeric_array
+from .codegen import (
+    array_item_type,
+    compile_function,
+    mapping_value_type,
+    optional_type,
+    reference,
+    union_types,
+)
+
+
 def min_str_len(instance, attribute, value):
     min_length = attribute.metadata.get('min_length', None)
     if min_length is None:
         return
-    if len(value) <= min_length:
+    if len(value) < min_length:
         raise ValueError(
             '\'{}\' must have a minimum length of {} chars'.format(
                 attribute.name, min_length
@@ -25,3 +45,379 @@ def max_str_len(instance, attribute, value):
 def min_max_str_len(instance, attribute, value):
     min_str_len(instance, attribute, value)
     max_str_len(instance, attribute, value)
+
+
+# --------------------------------------------------------------- #
+# Compiled Model validators
+# --------------------------------------------------------------- #
+
+
+def _invalid(message):
+    raise ValueError(message)
+
+
+def _has_duplicates(values):
+    try:
+        return len(set(values)) != len(values)
+    except TypeError:  # unhashable items
+        seen = []
+        for value in values:
+            if value in seen:
+                return True
+            seen.append(value)
+        return False
+
+
+def _is_ip_address(version):
+    def check(value):
+        try:
+            return ip_address(value).version == version
+        except ValueError:
+            return False
+
+    return check
+
+
+_format_checkers = {
+    'date': re.compile(r'\d{4}-\d{2}-\d{2}\Z').match,
+    'date-time': re.compile(
+        r'\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}:\d{2}(\.\d+)?'
+        r'([Zz]|[+-]\d{2}:\d{2})\Z'
+    ).match,
+    'email': re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+\Z').match,
+    'uuid': re.compile(
+        r'[0-9a-fA-F]{8}-([0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\Z'
+    ).match,
+    'byte': re.compile(r'[A-Za-z0-9+/]*={0,2}\Z').match,
+    'ipv4': _is_ip_address(4),
+    'ipv6': _is_ip_address(6),
+}
+
+
+# Compiled patterns, shared by every Model using the same one
+_patterns = {}
+
+
+def compile_pattern(pattern):
+    """
+    Returns the function checking whether a string matches `pattern`
+    anywhere, as the spec's `pattern` does. Patterns anchored with `^` only
+    need to be tried at the start of strings, so they use `match`.
+    """
+    checker = _patterns.get(pattern)
+    if checker is None:
+        compiled = re.compile(pattern)
+        checker = compiled.match if _is_anchored(pattern) else compiled.search
+        _patterns[pattern] = checker
+    return checker
+
+
+def _is_anchored(pattern):
+    # '^a|b' isn't, since 'b' may match anywhere
+    if not pattern.startswith('^'):
+        return False
+    depth, in_class, escaped = 0, False, False
+    for index, char in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            # ']' right after '[' or '[^' is a literal
+            in_class = char != ']' or pattern[index - 1] == '[' or (
+                pattern[index - 2:index] == '[^'
+            )
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return False
+    return True
+
+
+def _literal(namespace, value):
+    if type(value) in (int, float):
+        return repr(value)
+    return reference(namespace, 'constant', value)
+
+
+def _exclusive(metadata, key, bound):
+    # Swagger 2.0 makes exclusive_* flags on minimum/maximum, later versions
+    # make them bounds of their own
+    exclusive = metadata.get(key)
+    if isinstance(exclusive, bool):
+        return (bound, exclusive) if bound is not None else (None, False)
+    if exclusive is not None:
+        return exclusive, True
+    return bound, False
+
+
+def _constraint_checks(attribute, namespace):
+    metadata = attribute.metadata
+    name = attribute.name
+    type_ = optional_type(attribute.type) or attribute.type
+    checks = []
+
+    def check(condition, message, *args):
+        checks.append(
+            'if {}: _invalid({!r})'.format(
+                condition, message.format(name, *args)
+            )
+        )
+
+    # Strings
+    if metadata.get('min_length') is not None:
+        check(
+            'len(value) < {}'.format(
+                _literal(namespace, metadata['min_length'])
+            ),
+            "'{}' must have a minimum length of {} chars",
+            metadata['min_length'],
+        )
+    if metadata.get('max_length') is not None:
+        check(
+            'len(value) > {}'.format(
+                _literal(namespace, metadata['max_length'])
+            ),
+            "'{}' must have a maximum length of {} chars",
+            metadata['max_length'],
+        )
+    if type_ is str and metadata.get('pattern') is not None:
+        pattern = reference(
+            namespace, 'pattern', compile_pattern(metadata['pattern'])
+        )
+        check(
+            '{}(value) is None'.format(pattern),
+            "'{}' must match the pattern {!r}",
+            metadata['pattern'],
+        )
+    checker = _format_checkers.get(metadata.get('format'))
+    if type_ is str and checker is not None:
+        check(
+            'not {}(value)'.format(reference(namespace, 'format', checker)),
+            "'{}' must be a valid {}",
+            metadata['format'],
+        )
+
+    # Numbers, or every item of numeric arrays
+    if is_numeric_array(type_):
+        lowest, highest, subject = 'min(value)', 'max(value)', "'{}' items"
+        # Empty arrays have neither a minimum nor a maximum
+        guard = 'value and '
+    else:
+        lowest, highest, subject, guard = 'value', 'value', "'{}'", ''
+    minimum, exclusive = _exclusive(
+        metadata, 'exclusive_minimum', metadata.get('minimum')
+    )
+    if minimum is not None:
+        check(
+            '{}{} {} {}'.format(
+                guard,
+                lowest,
+                '<=' if exclusive else '<',
+                _literal(namespace, minimum),
+            ),
+            subject + ' must be greater than {}{}',
+            '' if exclusive else 'or equal to ',
+            minimum,
+        )
+    maximum, exclusive = _exclusive(
+        metadata, 'exclusive_maximum', metadata.get('maximum')
+    )
+    if maximum is not None:
+        check(
+            '{}{} {} {}'.format(
+                guard,
+                highest,
+                '>=' if exclusive else '>',
+                _literal(namespace, maximum),
+            ),
+            subject + ' must be less than {}{}',
+            '' if exclusive else 'or equal to ',
+            maximum,
+        )
+    multiple_of = metadata.get('multiple_of')
+    if multiple_of is not None:
+        if is_numeric_array(type_):
+            item_type, item = type_.item_type, '_i'
+        else:
+            item_type, item = type_, 'value'
+        if item_type is int and type(multiple_of) is int:
+            condition = '{} % {}'.format(item, multiple_of)
+        else:
+            condition = 'abs({0} / {1} - round({0} / {1})) > 1e-9'.format(
+                item, _literal(namespace, multiple_of)
+            )
+        if is_numeric_array(type_):
+            condition = 'any({} for _i in value)'.format(condition)
+        check(condition, subject + ' must be a multiple of {}', multiple_of)
+
+    # Arrays
+    if metadata.get('min_items') is not None:
+        check(
+            'len(value) < {}'.format(
+                _literal(namespace, metadata['min_items'])
+            ),
+            "'{}' must have at least {} items",
+            metadata['min_items'],
+        )
+    if metadata.get('max_items') is not None:
+        check(
+            'len(value) > {}'.format(
+                _literal(namespace, metadata['max_items'])
+            ),
+            "'{}' must have at most {} items",
+            metadata['max_items'],
+        )
+    if metadata.get('unique_items'):
+        check('_has_duplicates(value)', "'{}' must only have unique items")
+
+    # Objects
+    if metadata.get('min_properties') is not None:
+        check(
+            'len(value) < {}'.format(
+                _literal(namespace, metadata['min_properties'])
+            ),
+            "'{}' must have at least {} properties",
+            metadata['min_properties'],
+        )
+    if metadata.get('max_properties') is not None:
+        check(
+            'len(value) > {}'.format(
+                _literal(namespace, metadata['max_properties'])
+            ),
+            "'{}' must have at most {} properties",
+            metadata['max_properties'],
+        )
+
+    return checks
+
+
+def compile_validator(cls):
+    """
+    Generates a single function checking the metadata constraints of all of
+    the fields of the attrs class `cls`, or returns None if there are none.
+    """
+    namespace = {'_invalid': _invalid, '_has_duplicates': _has_duplicates}
+    lines = []
+    for attribute in attr.fields(cls):
+        checks = _constraint_checks(attribute, namespace)
+        if checks:
+            lines.append('    value = self.{}'.format(attribute.name))
+            lines.append('    if value is not None:')
+            lines.extend('        ' + check for check in checks)
+    if not lines:
+        return None
+    return compile_function(
+        '__validate__', ['def __validate__(self):'] + lines, namespace, cls
+    )
+
+
+# --------------------------------------------------------------- #
+# Async validators
+# --------------------------------------------------------------- #
+
+
+class BatchedValidator:
+
+    def __init__(self, validator):
+        self.validator = validator
+        update_wrapper(self, validator)
+
+    def __call__(self, values):
+        return self.validator(values)
+
+
+def batched(validator):
+    """
+    Marks an async validator as taking the list of every value it checks in
+    a Model tree, so that e.g. N items make one lookup instead of N.
+    """
+    return BatchedValidator(validator)
+
+
+async def validate_async(value):
+    """
+    Runs the async validators of the fields of every Model in `value`, a
+    Model or a list or dict of them, concurrently.
+    """
+    calls = []
+    batches = {}
+    _collect_async_validators(value, calls, batches)
+    if calls or batches:
+        await asyncio.gather(
+            *calls,
+            *(validator(values) for validator, values in batches.items())
+        )
+
+
+def _collect_async_validators(value, calls, batches):
+    cls = type(value)
+    if attr.has(cls):
+        validated, nested = _async_fields(cls)
+        for attribute, validator in validated:
+            field_value = getattr(value, attribute.name)
+            if field_value is None:
+                continue
+            if isinstance(validator, BatchedValidator):
+                batches.setdefault(validator, []).append(field_value)
+            else:
+                calls.append(validator(value, attribute, field_value))
+        for attribute in nested:
+            _collect_async_validators(
+                getattr(value, attribute.name), calls, batches
+            )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            _collect_async_validators(item, calls, batches)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_async_validators(item, calls, batches)
+
+
+# The fields with async validators of a class, and those that may hold
+# Models with async validators
+_async_fields_cache = WeakKeyDictionary()
+
+
+def _async_fields(cls):
+    fields = _async_fields_cache.get(cls)
+    if fields is None:
+        fields = _async_fields_cache[cls] = (
+            [
+                (attribute, attribute.metadata['async_validator'])
+                for attribute in attr.fields(cls)
+                if attribute.metadata.get('async_validator') is not None
+            ],
+            [
+                attribute
+                for attribute in attr.fields(cls)
+                if _reaches_async_validators(attribute.type, {cls})
+            ],
+        )
+    return fields
+
+
+def _reaches_async_validators(type_, seen):
+    if type_ is None or type_ is Any:
+        return True  # may be anything
+    types = union_types(type_)
+    if types is not None:
+        return any(_reaches_async_validators(t, seen) for t in types)
+    item_type = array_item_type(type_) or mapping_value_type(type_)
+    if item_type is not None:
+        return _reaches_async_validators(item_type, seen)
+    if not isinstance(type_, type):
+        return True
+    if not attr.has(type_):
+        return False
+    fields = attr.fields(type_)
+    if any(a.metadata.get('async_validator') is not None for a in fields):
+        return True
+    if type_ in seen:
+        return False
+    seen.add(type_)
+    return any(_reaches_async_validators(a.type, seen) for a in fields)
@@ -54,6 +54,11 @@ setup(
         'sanic>=0.7.0',
         'attrs>=18.0.0',
     ],
+    extras_require={
+        'brotli': ['brotli'],
+        'ciso8601': ['ciso8601'],
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Intended Audience :: Developers',
         'Development Status :: 4 - Beta',
@@ -0,0 +1,96 @@
+import pickle
+from typing import Optional
+
+import pytest
+from sanic_swagger import doc, serializer
+from sanic_swagger.arrays import FloatArray, IntArray
+
+
+class Samples(doc.Model):
+    values: FloatArray = doc.field(minimum=0, maximum=10, max_items=3)
+    counts: IntArray = doc.field(factory=IntArray, multiple_of=2)
+
+
+def test_arrays_pack_their_values():
+    values = FloatArray([1, 2.5])
+    assert values.typecode == 'd'
+    assert values == FloatArray((1.0, 2.5))
+    assert IntArray(memoryview(IntArray([1, 2]))) == IntArray([1, 2])
+    assert pickle.loads(pickle.dumps(values)) == values
+    assert FloatArray.convert(values) is values
+
+
+def test_arrays_from_numpy():
+    numpy = pytest.importorskip('numpy')
+    values = FloatArray(numpy.arange(3, dtype='float64'))
+    assert values == FloatArray([0, 1, 2])
+    assert values.as_numpy().tolist() == [0, 1, 2]
+
+
+def test_array_fields_are_converted():
+    samples = Samples(values=[1, 2])
+    assert type(samples.values) is FloatArray
+    samples = Samples.from_dict({'values': [1, 2], 'counts': [4]})
+    assert type(samples.values) is FloatArray
+    assert type(samples.counts) is IntArray
+    assert samples.to_json() == '{"values":[1.0,2.0],"counts":[4]}'
+
+
+def test_optional_array_fields_are_converted():
+    class Readings(doc.Model):
+        values: Optional[FloatArray] = doc.field(default=None)
+
+    assert type(Readings(values=[1]).values) is FloatArray
+    assert Readings(values=[1]).to_json() == '{"values":[1.0]}'
+    assert Readings().values is None
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'values': [1, -1]},
+    {'values': [11]},
+    {'values': [1, 2, 3, 4]},
+    {'values': [], 'counts': [2, 3]},
+])
+def test_array_fields_are_validated(kwargs):
+    with pytest.raises(ValueError):
+        Samples(**kwargs)
+
+
+def test_empty_array_fields_are_valid():
+    Samples(values=[])
+
+
+def test_serialize_array_fields():
+    registry = serializer.SchemaRegistry()
+    serializer._serialize_type(Samples, None, registry)
+    properties = registry.definitions[Samples]['properties']
+    assert properties['values'] == {
+        'type': 'array',
+        'items': {
+            'type': 'number',
+            'format': 'double',
+            'minimum': 0,
+            'maximum': 10,
+        },
+        'maxItems': 3,
+    }
+    assert properties['counts'] == {
+        'type': 'array',
+        'items': {'type': 'integer', 'format': 'int64', 'multipleOf': 2},
+    }
+
+
+def test_serialize_optional_array_fields():
+    class Readings(doc.Model):
+        values: Optional[FloatArray] = doc.field(default=None, minimum=0)
+
+    registry = serializer.SchemaRegistry()
+    serializer._serialize_type(Readings, None, registry)
+    properties = registry.definitions[Readings]['properties']
+    assert properties['values']['items'] == {
+        'type': 'number',
+        'format': 'double',
+        'minimum': 0,
+    }
+    with pytest.raises(ValueError):
+        Readings(values=[-1])
@@ -0,0 +1,89 @@
+from base64 import b64encode
+from typing import Optional
+
+import pytest
+from sanic_swagger import doc
+from sanic_swagger.binary import LazyBytes, encode_bytes, iter_base64
+
+
+class Attachment(doc.Model):
+    name: str = doc.field()
+    content: bytes = doc.field(default=None)
+
+
+def test_lazy_bytes_decode_on_first_use():
+    value = LazyBytes('aGVsbG8=')
+    assert not value.decoded
+    assert value == b'hello'
+    assert value.decoded
+    assert bytes(value[1:3]) == b'el'
+    assert len(value) == 5
+
+
+def test_lazy_bytes_are_encoded_back_as_they_came():
+    value = LazyBytes('aGVsbG8=')
+    assert value.to_json() == '"aGVsbG8="'
+    assert not value.decoded
+    assert LazyBytes.from_bytes(b'hello').to_json() == '"aGVsbG8="'
+
+
+def test_invalid_base64_raises_value_error():
+    with pytest.raises(ValueError):
+        LazyBytes('a').tobytes()
+
+
+def test_bytes_fields():
+    attachment = Attachment.from_dict({'name': 'a', 'content': 'aGVsbG8='})
+    assert isinstance(attachment.content, LazyBytes)
+    assert attachment.to_json() == '{"name":"a","content":"aGVsbG8="}'
+    assert Attachment('a', b'hello').content == b'hello'
+    assert Attachment('a', b'hello').to_json() == (
+        '{"name":"a","content":"aGVsbG8="}'
+    )
+
+
+def test_optional_bytes_fields():
+    class Upload(doc.Model):
+        content: Optional[bytes] = doc.field(default=None)
+
+    assert Upload(content='aGVsbG8=').to_json() == '{"content":"aGVsbG8="}'
+    assert Upload().content is None
+
+
+@pytest.mark.parametrize('value', ['a', 'aGVsbG8', 'aGV"bG8=', 'aGVs bG8='])
+def test_bytes_fields_reject_invalid_base64(value):
+    with pytest.raises(ValueError):
+        Attachment('a', value)
+    with pytest.raises(ValueError):
+        Attachment.from_dict({'name': 'a', 'content': value})
+
+
+def test_declared_converters_are_kept():
+    class Raw(doc.Model):
+        content: bytes = doc.field(converter=str.encode)
+
+    assert Raw('abc').content == b'abc'
+
+
+def test_annotated_bytes_class_attributes_are_not_fields():
+    class Plain(doc.Model):
+        name: str = doc.field()
+        content: bytes = None
+
+    assert Plain.content is None
+    assert Plain('a').to_json() == '{"name":"a"}'
+
+
+def test_encode_bytes():
+    assert encode_bytes(memoryview(b'hello')) == '"aGVsbG8="'
+
+
+@pytest.mark.parametrize('value', [
+    b'x' * 1000,
+    LazyBytes(b64encode(b'x' * 1000).decode('ascii')),
+    LazyBytes.from_bytes(b'x' * 1000),
+])
+def test_iter_base64(value):
+    chunks = list(iter_base64(value, chunk_size=100))
+    assert len(chunks) > 1
+    assert b''.join(chunks) == b64encode(b'x' * 1000)
@@ -0,0 +1,128 @@
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+import pytest
+from sanic import Sanic
+from sanic.response import text
+from sanic.views import HTTPMethodView
+from sanic_swagger import doc, openapi_blueprint
+
+
+class Item(doc.Model):
+    name: str = doc.field(min_length=1)
+    count: int = doc.field(default=1)
+
+
+class Parent(doc.Model):
+    child: Optional[Item] = doc.field(default=None)
+    kids: List[Item] = doc.field(factory=list)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def app():
+    app = Sanic(__name__, strict_slashes=True)
+    app.blueprint(openapi_blueprint)
+
+    @app.post('/item')
+    @doc.summary('Create an item')
+    @doc.consumes(Item, location='body', offload_threshold=100)
+    async def create(request, body):
+        return text('{} {}'.format(type(body).__name__, body.name))
+
+    @app.post('/items')
+    @doc.consumes(List[Item], location='body', offload_threshold=100)
+    def create_many(request, body):
+        return text(','.join(item.name for item in body))
+
+    @app.post('/parent')
+    @doc.consumes(Parent, location='body', offload_threshold=100)
+    def create_parent(request, body):
+        return text(str(len(body.kids)))
+
+    return app
+
+
+def test_small_bodies_are_structured_on_the_loop(app):
+    app.config.API_OFFLOAD_EXECUTOR = executor = CountingExecutor()
+    _, response = app.test_client.post('/item', data=json.dumps({
+        'name': 'a'
+    }))
+    assert response.status == 200
+    assert response.text == 'Item a'
+    assert executor.submitted == 0
+
+
+def test_large_bodies_are_offloaded(app):
+    app.config.API_OFFLOAD_EXECUTOR = executor = CountingExecutor()
+    items = [{'name': str(index)} for index in range(50)]
+    _, response = app.test_client.post('/items', data=json.dumps(items))
+    assert response.status == 200
+    assert response.text == ','.join(str(index) for index in range(50))
+    assert executor.submitted == 1
+
+
+def test_large_bodies_are_offloaded_to_processes(app):
+    # Shut down before the next test server binds, as workers are forked
+    # with its socket
+    with ProcessPoolExecutor(1) as executor:
+        app.config.API_OFFLOAD_EXECUTOR = executor
+        _, response = app.test_client.post('/item', data=json.dumps({
+            'name': 'a' * 200
+        }))
+    assert response.status == 200
+    assert response.text == 'Item ' + 'a' * 200
+
+
+@pytest.mark.parametrize('uri, body', [
+    ('/item', 'not json'),
+    ('/item', '[]'),
+    ('/item', '{}'),
+    ('/item', '{"name": ""}'),
+    ('/items', '{"name": "a"}'),
+    ('/items', json.dumps([{'name': ''}] * 50)),
+    ('/items', '[1, 2]'),
+    ('/parent', '{"child": [1, 2]}'),
+    ('/parent', '{"kids": [5]}'),
+    ('/parent', '{"kids": 5}'),
+])
+def test_invalid_bodies(app, uri, body):
+    _, response = app.test_client.post(uri, data=body)
+    assert response.status == 400
+
+
+def test_structured_bodies_are_documented(app):
+    _, response = app.test_client.get('/openapi/spec.json')
+    operation = response.json['paths']['/item']['post']
+    assert operation['summary'] == 'Create an item'
+    assert operation['parameters'][0]['schema'] == {
+        '$ref': '#/definitions/Item',
+    }
+
+
+def test_views_get_structured_bodies():
+    app = Sanic(__name__)
+
+    class ItemView(HTTPMethodView):
+        @doc.consumes(Item, location='body', offload_threshold=100)
+        def post(self, request, body):
+            return text(body.name)
+
+    app.add_route(ItemView.as_view(), '/item')
+    _, response = app.test_client.post('/item', data='{"name": "a"}')
+    assert response.text == 'a'
+
+
+def test_only_models_are_structured():
+    with pytest.raises(TypeError):
+        doc.consumes(int, location='body', offload_threshold=0)(print)
+    with pytest.raises(ValueError):
+        doc.consumes(Item, offload_threshold=0)(print)
@@ -0,0 +1,134 @@
+import pytest
+from sanic import Sanic
+from sanic.response import json, text
+from sanic_swagger import caching, doc, openapi_blueprint
+
+
+class Item(doc.Model):
+    name: str = doc.field()
+
+
+@pytest.fixture
+def app():
+    app = Sanic(__name__, strict_slashes=True)
+    app.blueprint(openapi_blueprint)
+    app.calls = 0
+
+    @app.get('/items')
+    @doc.produces(Item)
+    @doc.cache(ttl=60, vary=['Accept-Language'])
+    async def items(request):
+        app.calls += 1
+        return json(
+            {'name': request.args.get('name', 'a') * 2000},
+            headers={'X-Calls': str(app.calls)},
+        )
+
+    @app.get('/missing')
+    @doc.cache(ttl=60)
+    def missing(request):
+        app.calls += 1
+        return text('missing', status=404)
+
+    return app
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(caching, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_responses_are_cached(app, clock):
+    _, first = app.test_client.get('/items')
+    _, second = app.test_client.get('/items')
+    assert app.calls == 1
+    assert first.status == second.status == 200
+    assert first.json == second.json
+    assert second.headers['X-Calls'] == '1'
+    assert second.headers['Cache-Control'] == 'max-age=60'
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Content-Type'] == 'application/json'
+
+
+def test_cached_responses_expire_for_clients(app, clock):
+    _, first = app.test_client.get('/items')
+    assert first.headers['Cache-Control'] == 'max-age=60'
+    clock[0] = 45.5
+    _, second = app.test_client.get('/items')
+    assert second.headers['Cache-Control'] == 'max-age=14'
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert app.calls == 1
+
+
+def test_cache_keys(app):
+    app.test_client.get('/items')
+    app.test_client.get('/items', params={'name': 'b'})
+    app.test_client.get('/items', headers={'Accept-Language': 'fr'})
+    app.test_client.get('/items', headers={'Accept-Language': 'fr'})
+    assert app.calls == 3
+
+
+def test_cached_responses_vary(app):
+    _, response = app.test_client.get(
+        '/items', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.headers['Vary'] == 'Accept-Language, Accept-Encoding'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.json == {'name': 'a' * 2000}
+
+
+def test_cached_responses_are_conditional(app):
+    _, response = app.test_client.get('/items')
+    _, response = app.test_client.get(
+        '/items', headers={'If-None-Match': response.headers['ETag']}
+    )
+    assert response.status == 304
+    assert app.calls == 1
+
+
+def test_only_successful_responses_are_cached(app):
+    app.test_client.get('/missing')
+    _, response = app.test_client.get('/missing')
+    assert response.status == 404
+    assert app.calls == 2
+
+
+def test_response_cache_expires(clock):
+    cache = caching.ResponseCache(ttl=10)
+    cache.put('key', b'body', {})
+    clock[0] = 10
+    assert cache.get('key') == (10, b'body', {})
+    assert cache.headers(10) == {'Cache-Control': 'max-age=0'}
+    clock[0] = 11
+    assert cache.get('key') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = caching.ResponseCache(ttl=10, max_entries=2)
+    cache.put('a', b'a', {})
+    cache.put('b', b'b', {})
+    cache.get('a')
+    cache.put('c', b'c', {})
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+
+
+def test_cached_routes_are_documented(app):
+    _, response = app.test_client.get('/openapi/spec.json')
+    responses = response.json['paths']['/items']['get']['responses']
+    assert responses['200']['schema']['$ref'] == '#/definitions/Item'
+    assert responses['200']['headers']['Cache-Control'] == {
+        'type': 'string',
+        'description': 'max-age of at most 60, the seconds left before the '
+        'cached response expires',
+    }
+    assert set(responses['200']['headers']) == {
+        'Cache-Control',
+        'ETag',
+        'Vary',
+    }
+    assert '304' in responses
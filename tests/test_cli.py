@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from sanic_swagger.__main__ import main
+
+
+APP_MODULE = """
+from sanic import Sanic
+from sanic_swagger import doc, openapi_blueprint
+
+app = Sanic('cli_app')
+app.blueprint(openapi_blueprint)
+
+
+@app.get('/pets')
+@doc.summary('List pets')
+async def pets(req):
+    pass
+"""
+
+
+@pytest.fixture
+def app_module(tmpdir, monkeypatch):
+    tmpdir.join('cli_app.py').write(APP_MODULE)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    return 'cli_app:app'
+
+
+def test_build_writes_the_spec(app_module, tmpdir):
+    output = str(tmpdir.join('spec.json'))
+    main(['build', app_module, '-o', output])
+
+    with open(output) as f:
+        spec = json.load(f)
+    assert spec['paths']['/pets']['get']['summary'] == 'List pets'
+    assert tmpdir.join('spec.json.gz').exists()
+
+
+def test_build_without_compressed_variants(app_module, tmpdir):
+    output = str(tmpdir.join('spec.json'))
+    main(['build', app_module, '-o', output, '--no-compress'])
+
+    assert tmpdir.join('spec.json').exists()
+    assert not tmpdir.join('spec.json.gz').exists()
+
+
+def test_build_requires_module_and_name(app_module, tmpdir):
+    with pytest.raises(ValueError):
+        main(['build', 'cli_app', '-o', str(tmpdir.join('spec.json'))])
@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import pytest
+from sanic_swagger import doc
+from sanic_swagger.dates import parse_date, parse_datetime
+
+
+class Event(doc.Model):
+    on: date = doc.field()
+    at: datetime = doc.field(default=None)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2018-10-04T12:30:00', datetime(2018, 10, 4, 12, 30)),
+    ('2018-10-04 12:30', datetime(2018, 10, 4, 12, 30)),
+    ('2018-10-04T12:30:00.5Z', datetime(
+        2018, 10, 4, 12, 30, 0, 500000, timezone.utc
+    )),
+    ('2018-10-04T12:30:00+02:00', datetime(
+        2018, 10, 4, 12, 30, tzinfo=timezone(timedelta(hours=2))
+    )),
+    ('2018-10-04T12:30:00-0130', datetime(
+        2018, 10, 4, 12, 30, tzinfo=timezone(-timedelta(hours=1, minutes=30))
+    )),
+])
+def test_parse_datetime(value, expected):
+    parsed = parse_datetime(value)
+    assert parsed == expected
+    assert parsed.utcoffset() == expected.utcoffset()
+
+
+@pytest.mark.parametrize(
+    'value', ['2018-10-04', 'yesterday', '2018-13-01T00:00']
+)
+def test_parse_invalid_datetime(value):
+    with pytest.raises(ValueError):
+        parse_datetime(value)
+
+
+def test_parse_date():
+    assert parse_date('2018-10-04') == date(2018, 10, 4)
+    assert parse_date('2018-10-04') is parse_date('2018-10-04')
+    with pytest.raises(ValueError):
+        parse_date('2018-10-04T00:00')
+
+
+def test_date_fields_are_converted():
+    event = Event(on='2018-10-04', at='2018-10-04T12:30:00')
+    assert event.on == date(2018, 10, 4)
+    assert event.at == datetime(2018, 10, 4, 12, 30)
+    assert Event(on=datetime(2018, 10, 4, 12)).on == date(2018, 10, 4)
+
+    event = Event.from_dict({'on': '2018-10-04', 'at': '2018-10-04T12:30Z'})
+    assert event.at.tzinfo is timezone.utc
+    assert event.to_json() == (
+        '{"on":"2018-10-04","at":"2018-10-04T12:30:00+00:00"}'
+    )
+
+
+def test_optional_date_fields_are_converted():
+    class Meeting(doc.Model):
+        on: Optional[date] = doc.field(default=None)
+        at: Optional[datetime] = doc.field(default=None)
+
+    meeting = Meeting(on='2018-10-04', at='2018-10-04T12:30:00Z')
+    assert meeting.on == date(2018, 10, 4)
+    assert meeting.to_json() == (
+        '{"on":"2018-10-04","at":"2018-10-04T12:30:00+00:00"}'
+    )
+    assert Meeting.from_dict({'at': '2018-10-04T12:30:00'}).at == datetime(
+        2018, 10, 4, 12, 30
+    )
+    assert Meeting().at is None
+
+
+def test_declared_converters_are_kept():
+    class Stamped(doc.Model):
+        at: datetime = doc.field(converter=datetime.utcfromtimestamp)
+
+    assert Stamped(0).at == datetime(1970, 1, 1)
+
+
+def test_annotated_date_class_attributes_are_not_fields():
+    class Plain(doc.Model):
+        name: str = doc.field()
+        created: datetime = None
+        on: date = None
+
+    assert Plain.created is None and Plain.on is None
+    assert Plain('a').to_json() == '{"name":"a"}'
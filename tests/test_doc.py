@@ -0,0 +1,166 @@
+import json
+import weakref
+from typing import List, Union
+
+import pytest
+import attr
+from sanic_swagger import doc, serializer
+
+
+class Tag(doc.Model, slots=True):
+    name: str = doc.field(min_length=1)
+
+
+class Pet(doc.Model, slots=True, frozen=True, cache_hash=True):
+    name: str = doc.field()
+    tag: Tag = doc.field(default=None)
+    tags: List[Tag] = doc.field(factory=list, hash=False)
+
+
+def test_slotted_model():
+    tag = Tag(name='a')
+    assert not hasattr(tag, '__dict__')
+    assert attr.has(Tag)
+    assert weakref.ref(tag)() is tag
+    with pytest.raises(AttributeError):
+        tag.other = 1
+
+
+def test_slotted_model_converts_and_validates():
+    assert Pet(name='a', tag={'name': 'b'}).tag == Tag(name='b')
+    with pytest.raises(ValueError):
+        Tag(name='')
+
+
+def test_frozen_model():
+    pet = Pet(name='a')
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        pet.name = 'b'
+    assert hash(pet) == hash(Pet(name='a'))
+
+
+def test_generated_functions_on_frozen_model():
+    pet = Pet.from_dict({'name': 'a', 'tags': [{'name': 'b'}]})
+    assert pet == Pet(name='a', tags=[Tag(name='b')])
+    assert hash(pet) == hash(Pet(name='a', tags=[Tag(name='b')]))
+    assert Pet.from_dict({'name': 'a', 'tag': {'name': 'b'}}).tag.name == 'b'
+    assert pet.to_json() == '{"name":"a","tag":null,"tags":[{"name":"b"}]}'
+
+
+def test_slotted_model_subclass():
+    class Dog(Tag, slots=True):
+        good: bool = doc.field(default=True)
+
+    dog = Dog.from_dict({'name': 'Rex'})
+    assert not hasattr(dog, '__dict__')
+    assert (dog.name, dog.good) == ('Rex', True)
+
+
+def test_serialize_slotted_model():
+    registry = serializer.SchemaRegistry()
+    serializer._serialize_type(Pet, None, registry)
+    assert registry.definitions[Pet]['properties']['tag'] == {
+        'type': 'object',
+        'format': None,
+        '$ref': '#/definitions/Tag',
+    }
+
+
+class Row(doc.Model):
+    name: str = doc.field(min_length=5)
+    tag: Tag = doc.field(default=None)
+    tags: List[Tag] = doc.field(factory=list)
+    _secret: int = doc.field(default=0)
+    count: int = doc.field(default=0, init=False)
+
+
+def test_construct_unchecked_skips_converters_and_validators():
+    row = Row.construct_unchecked('a', {'name': 'b'}, secret=1)
+    assert row.name == 'a'
+    assert row.tag == {'name': 'b'}
+    assert row.tags == [] and row.tags is not Row.construct_unchecked('a').tags
+    assert row._secret == 1
+    assert row.count == 0
+    with pytest.raises(TypeError):
+        Row.construct_unchecked()
+
+
+def test_construct_unchecked_frozen():
+    pet = Pet.construct_unchecked(name='a', tags=[Tag(name='b')])
+    assert pet == Pet(name='a', tags=[Tag(name='b')])
+    assert hash(pet) == hash(Pet(name='a'))
+
+
+def test_construct_unchecked_list():
+    rows = Row.construct_unchecked_list([('a',), {'name': 'b', 'secret': 2}])
+    assert [row.name for row in rows] == ['a', 'b']
+    assert [row._secret for row in rows] == [0, 2]
+
+
+class Cat(doc.Model):
+    kind: str = doc.field(default='cat')
+
+
+class Dog(doc.Model):
+    kind: str = doc.field(default='dog')
+
+
+class Owner(doc.Model):
+    pet: Union[Cat, Dog] = doc.field(discriminator='kind', default=None)
+    pets: List[Union[Cat, Dog]] = doc.field(
+        discriminator='kind', factory=list
+    )
+
+
+def test_discriminator_is_kept_in_metadata():
+    assert attr.fields(Owner).pet.metadata == {'discriminator': 'kind'}
+
+
+def test_discriminated_converter():
+    assert Owner(pet={'kind': 'dog'}).pet == Dog()
+    assert Owner(pet=Cat()).pet == Cat()
+    assert Owner().pet is None
+    with pytest.raises(ValueError):
+        Owner(pet={'kind': 'bird'})
+
+
+def test_annotated_class_attributes_are_not_fields():
+    class Plain(doc.Model):
+        name: str = doc.field(default='')
+        value: Union[int, str] = None
+
+    assert Plain.value is None
+    assert Plain(name='a').to_json() == '{"name":"a"}'
+
+
+def test_discriminated_list_converter():
+    owner = Owner(pets=[{'kind': 'cat'}, Dog()])
+    assert owner.pets == [Cat(), Dog()]
+    assert owner.to_json() == (
+        '{"pet":null,"pets":[{"kind":"cat"},{"kind":"dog"}]}'
+    )
+    with pytest.raises(ValueError):
+        Owner(pets=[{'kind': 'bird'}])
+
+
+def test_discriminated_models_round_trip():
+    owner = Owner(pet={'kind': 'dog'}, pets=[{'kind': 'cat'}])
+    assert Owner.from_dict(json.loads(owner.to_json())) == owner
+
+
+def test_discriminated_models_must_have_the_property():
+    class Bird(doc.Model):
+        name: str = doc.field(default='')
+
+    with pytest.raises(TypeError, match="Bird must have a 'kind' field"):
+        class Broken(doc.Model):
+            pet: Union[Cat, Bird] = doc.field(discriminator='kind')
+
+
+def test_discriminator_values_must_be_unique():
+    class Other(doc.Model):
+        kind: str = doc.field(default='cat')
+
+    with pytest.raises(TypeError, match='same kind'):
+        class Broken(doc.Model):
+            pet: Union[Cat, Other] = doc.field(discriminator='kind')
@@ -0,0 +1,93 @@
+import gzip
+
+import pytest
+from sanic_swagger import encoded
+from sanic_swagger.encoded import EncodedBody
+
+
+class FakeRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+@pytest.fixture
+def body():
+    return EncodedBody.from_json({'key': 'value' * 100})
+
+
+def test_gzip_variant_decompresses_to_the_body(body):
+    assert gzip.decompress(body.gzip) == body.body
+
+
+def test_small_bodies_are_not_compressed():
+    body = EncodedBody(b'{}')
+    assert body.gzip is None
+    assert body.brotli is None
+
+
+def test_etag_is_stable():
+    assert EncodedBody(b'{}').etag == EncodedBody(b'{}').etag
+    assert EncodedBody(b'{}').etag != EncodedBody(b'[]').etag
+
+
+def test_if_none_match_returns_not_modified(body):
+    request = FakeRequest({'If-None-Match': body.etag})
+    response = encoded.encoded_response(request, body)
+    assert response.status == 304
+
+
+def test_if_none_match_accepts_lists_and_strong_tags(body):
+    strong = body.etag[2:]
+    request = FakeRequest({'If-None-Match': '"other", ' + strong})
+    response = encoded.encoded_response(request, body)
+    assert response.status == 304
+
+
+def test_gzip_is_picked_from_accept_encoding(body):
+    request = FakeRequest({'Accept-Encoding': 'deflate, gzip;q=0.8'})
+    response = encoded.encoded_response(request, body)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.body == body.gzip
+
+
+def test_rejected_encodings_are_not_used(body):
+    request = FakeRequest({'Accept-Encoding': 'gzip;q=0'})
+    response = encoded.encoded_response(request, body)
+    assert 'Content-Encoding' not in response.headers
+    assert response.body == body.body
+
+
+@pytest.mark.skipif(encoded.brotli is None, reason='brotli not installed')
+def test_brotli_is_preferred(body):
+    request = FakeRequest({'Accept-Encoding': 'gzip, br'})
+    response = encoded.encoded_response(request, body)
+    assert response.headers['Content-Encoding'] == 'br'
+
+
+@pytest.mark.skipif(encoded.brotli is None, reason='brotli not installed')
+@pytest.mark.parametrize('quality', [0, 4, 11])
+def test_brotli_quality(body, quality):
+    compressed = EncodedBody(body.body, brotli_quality=quality).brotli
+    assert encoded.brotli.decompress(compressed) == body.body
+
+
+def test_gzip_level(body):
+    fastest = EncodedBody(body.body, gzip_level=1).gzip
+    assert gzip.decompress(fastest) == body.body
+    assert len(fastest) >= len(body.gzip)
+
+
+def test_save_and_load_round_trip(body, tmpdir):
+    path = str(tmpdir.join('body.json'))
+    body.save(path)
+    loaded = EncodedBody.load(path)
+    assert loaded.body == body.body
+    assert loaded.gzip == body.gzip
+    assert loaded.etag == body.etag
+
+
+def test_save_removes_stale_variants(body, tmpdir):
+    path = str(tmpdir.join('body.json'))
+    body.save(path)
+    EncodedBody(body.body, compress=False).save(path)
+    assert not tmpdir.join('body.json.gz').exists()
@@ -0,0 +1,93 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from sanic import Sanic
+from sanic_swagger import doc
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+class Tag(doc.Model):
+    name: str = doc.field()
+    color: Optional[Color] = doc.field(default=None)
+
+
+class Pet(doc.Model):
+    name: str = doc.field()
+    age: int = doc.field(default=0)
+    weight: float = doc.field(default=1.5)
+    alive: bool = doc.field(default=True)
+    born: date = doc.field(default=date(2018, 1, 2))
+    seen: Optional[datetime] = doc.field(default=None)
+    photo: bytes = doc.field(default=b'\x00\xff')
+    tag: Optional[Tag] = doc.field(default=None)
+    tags: List[Tag] = doc.field(factory=list)
+    by_name: Dict[str, List[int]] = doc.field(factory=dict)
+    extra: Any = doc.field(default=None)
+
+
+class SpecialTag(Tag):
+    special: bool = doc.field(default=True)
+
+
+def test_to_json():
+    pet = Pet(
+        name='Rex "the dog"',
+        seen=datetime(2018, 1, 2, 3, 4, 5),
+        tag=Tag(name='a', color=Color.RED),
+        tags=[Tag(name='b'), SpecialTag(name='c')],
+        by_name={'x': [1, 2]},
+        extra={'colors': [Color.RED], 'on': date(2018, 1, 2)},
+    )
+
+    assert json.loads(pet.to_json()) == {
+        'name': 'Rex "the dog"',
+        'age': 0,
+        'weight': 1.5,
+        'alive': True,
+        'born': '2018-01-02',
+        'seen': '2018-01-02T03:04:05',
+        'photo': 'AP8=',
+        'tag': {'name': 'a', 'color': 'red'},
+        'tags': [
+            {'name': 'b', 'color': None},
+            {'name': 'c', 'color': None, 'special': True},
+        ],
+        'by_name': {'x': [1, 2]},
+        'extra': {'colors': ['red'], 'on': '2018-01-02'},
+    }
+
+
+def test_to_json_round_trips_through_from_dict():
+    tag = Tag(name='a', color=Color.RED)
+    assert Tag.from_dict(json.loads(tag.to_json())) == tag
+
+
+def test_json_response():
+    app = Sanic('test_json_response')
+
+    @app.get('/pet')
+    def pet(request):
+        return doc.json_response(Tag(name='a'), status=201)
+
+    @app.get('/pets')
+    def pets(request):
+        return doc.json_response(
+            [Tag(name='a'), Tag(name='b')], headers={'X-Count': '2'}
+        )
+
+    _, response = app.test_client.get('/pet')
+    assert response.status == 201
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.json == {'name': 'a', 'color': None}
+
+    _, response = app.test_client.get('/pets')
+    assert response.headers['X-Count'] == '2'
+    assert response.json == [
+        {'name': 'a', 'color': None},
+        {'name': 'b', 'color': None},
+    ]
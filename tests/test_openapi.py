@@ -1,4 +1,5 @@
 import json
+from concurrent.futures import Executor, Future
 
 import attr
 import pytest
@@ -8,6 +9,7 @@ from sanic.response import text
 from sanic.views import HTTPMethodView
 from sanic_swagger import (
     doc,
+    openapi,
     openapi_blueprint
 )
 
@@ -349,3 +351,309 @@ def test_class_based_routing(app):
     assert response.status == 200
     _, response = app.test_client.get('/routeless/')
     assert response.status == 404
+
+
+def test_spec_has_an_etag(app):
+    request, response = app.test_client.get('/openapi/spec.json')
+    assert response.status == 200
+    etag = response.headers['ETag']
+
+    request, response = app.test_client.get(
+        '/openapi/spec.json', headers={'If-None-Match': etag}
+    )
+    assert response.status == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_spec_etag_changes_with_the_spec(app):
+    request, response = app.test_client.get('/openapi/spec.json')
+    etag = response.headers['ETag']
+
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    request, response = app.test_client.get(
+        '/openapi/spec.json', headers={'If-None-Match': etag}
+    )
+    assert response.status == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_spec_is_served_gzipped(app):
+    request, response = app.test_client.get(
+        '/openapi/spec.json', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    response_schema = json.loads(response.body.decode())
+    assert response_schema['paths'] == {}
+
+
+def test_spec_is_served_uncompressed(app):
+    request, response = app.test_client.get(
+        '/openapi/spec.json', headers={'Accept-Encoding': 'identity'}
+    )
+    assert 'Content-Encoding' not in response.headers
+
+
+class NeverFinishingExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        return Future()
+
+
+def test_async_build_serves_the_spec(app):
+    app.config.API_SPEC_ASYNC_BUILD = True
+    app.config.API_SPEC_AWAIT_BUILD = True
+
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    assert response.status == 200
+    response_schema = json.loads(response.body.decode())
+    assert '/' in response_schema['paths']
+
+
+def test_async_build_answers_503_until_ready(app):
+    app.config.API_SPEC_ASYNC_BUILD = True
+    app.config.API_SPEC_EXECUTOR = NeverFinishingExecutor()
+    app.config.API_SPEC_RETRY_AFTER = 5
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    assert response.status == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_spec_is_loaded_from_an_artifact(app, tmpdir):
+    artifact = tmpdir.join('spec.json')
+    artifact.write(json.dumps({'swagger': '2.0', 'paths': {'/built': {}}}))
+    app.config.API_SPEC_ARTIFACT = str(artifact)
+
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    request, response = app.test_client.get(
+        '/openapi/spec.json', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert 'Content-Encoding' not in response.headers
+    response_schema = json.loads(response.body.decode())
+    assert response_schema['paths'] == {'/built': {}}
+
+
+def test_spec_is_shared_through_a_file(app, tmpdir):
+    path = tmpdir.join('spec.json')
+    app.config.API_SPEC_SHARED = str(path)
+
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert '/' in response_schema['paths']
+    # Cleaned up once the server stops
+    assert not path.exists()
+
+
+def test_routes_added_after_startup_are_documented(app):
+    @app.listener('after_server_start')
+    def add_route(app, loop):
+        @app.get('/late')
+        @doc.summary('Added late')
+        async def late(req):
+            pass
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert response_schema['paths']['/late']['get']['summary'] == \
+        'Added late'
+
+
+def test_routes_replaced_after_startup_are_documented(app):
+    @app.get('/')
+    @doc.summary('Original')
+    async def original(req):
+        pass
+
+    @doc.summary('Replaced')
+    async def replaced(req):
+        pass
+
+    @app.listener('after_server_start')
+    def replace_route(app, loop):
+        app.remove_route('/')
+        app.add_route(replaced, '/')
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert response_schema['paths']['/']['get']['summary'] == 'Replaced'
+
+
+def test_spec_requests_do_not_scan_unchanged_routes(app, monkeypatch):
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    def scan(app):
+        raise AssertionError('the routes should not be scanned')
+
+    @app.listener('after_server_start')
+    def watch_scans(app, loop):
+        monkeypatch.setattr(openapi, '_routes_changed', scan)
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    assert response.status == 200
+
+
+def test_refresh_only_documents_new_routes(app, monkeypatch):
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    app.test_client.get('/openapi/spec.json')
+    documented = []
+    document_route = openapi._document_route
+
+    def spy(app, uri, *args):
+        documented.append(uri)
+        return document_route(app, uri, *args)
+
+    monkeypatch.setattr(openapi, '_document_route', spy)
+    assert not openapi.refresh_spec(app)
+
+    @app.get('/new')
+    async def new(req):
+        pass
+
+    assert openapi.refresh_spec(app)
+    assert documented == ['/new']
+    assert '/new' in openapi._spec['paths']
+
+
+def test_rebuilds_do_not_grow_required_fields(app):
+    class Required(doc.Model):
+        name: str = doc.field(required=True)
+
+    @app.get('/')
+    @doc.consumes(Required)
+    @doc.produces(Required)
+    async def noop(req):
+        pass
+
+    for _ in range(3):
+        request, response = app.test_client.get('/openapi/spec.json')
+    registry = openapi.schema_registry(app)
+    assert registry.required_fields[Required] == ['name']
+
+
+def test_definitions_do_not_leak_between_apps(app):
+    class OnlyInOtherApp(doc.Model):
+        pass
+
+    other_app = Sanic('other_app')
+    other_app.blueprint(openapi_blueprint)
+
+    @other_app.get('/')
+    @doc.produces(OnlyInOtherApp)
+    async def noop(req):
+        pass
+
+    other_app.test_client.get('/openapi/spec.json')
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert 'OnlyInOtherApp' not in response_schema['definitions']
+
+
+def test_build_stats_are_reported(app):
+    reports = []
+    app.config.API_SPEC_STATS_CALLBACK = lambda app, stats: reports.append(
+        stats
+    )
+
+    class Timed(doc.Model):
+        name: str = doc.field()
+
+    @app.get('/<name>')
+    @doc.produces(Timed)
+    async def noop(req, name):
+        pass
+
+    app.test_client.get('/openapi/spec.json')
+    stats = reports[-1]
+    assert stats is openapi.build_stats(app)
+    for phase in ('routes', 'serialize', 'path_templates', 'remove_nulls',
+                  'definitions', 'tags', 'encode'):
+        assert phase in stats.phases
+    assert '/<name>' in stats.routes
+    assert 'Timed' in stats.models
+    assert stats.schemas > 0
+    assert stats.total > 0
+
+
+def test_build_stats_are_coarse_by_default(app):
+    class Timed(doc.Model):
+        name: str = doc.field()
+
+    @app.get('/<name>')
+    @doc.produces(Timed)
+    async def noop(req, name):
+        pass
+
+    app.test_client.get('/openapi/spec.json')
+    stats = openapi.build_stats(app)
+    assert set(stats.phases) == {'routes', 'definitions', 'tags', 'encode'}
+    assert stats.routes == {}
+    assert stats.models == {}
+    assert stats.schemas > 0
+
+
+def test_stats_endpoint_is_disabled_by_default(app):
+    request, response = app.test_client.get('/openapi/_stats')
+    assert response.status == 404
+
+
+def test_stats_endpoint(app):
+    app.config.API_SPEC_STATS_ENDPOINT = True
+
+    @app.get('/')
+    async def noop(req):
+        pass
+
+    request, response = app.test_client.get('/openapi/_stats')
+    stats = json.loads(response.body.decode())
+    assert '/' in stats['routes']
+    assert 'routes' in stats['phases']
+
+
+def test_typed_path_parameters_are_templated(app):
+    @app.get('/<pet_id:int>/photos/<name:[a-z]+>')
+    async def noop(req, pet_id, name):
+        pass
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert '/{pet_id}/photos/{name}' in response_schema['paths']
+
+
+def test_blueprint_routes_are_tagged(app):
+    class SimpleView(HTTPMethodView):
+        def get(self, request):
+            return text('')
+
+    pets = Blueprint('pets', url_prefix='pets')
+
+    @pets.get('/')
+    async def list_pets(req):
+        pass
+
+    pets.add_route(SimpleView.as_view(), '/view')
+    app.blueprint(pets)
+
+    request, response = app.test_client.get('/openapi/spec.json')
+    response_schema = json.loads(response.body.decode())
+    assert response_schema['paths']['/pets/']['get']['tags'] == ['pets']
+    assert response_schema['paths']['/pets/view']['get']['tags'] == ['pets']
+    assert response_schema['tags'] == [{'name': 'pets'}]
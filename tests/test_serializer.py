@@ -195,3 +195,92 @@ def test_attr_class_is_recursively_checked():
         serializer._serialize_raw_type_information(Foo, None)
     except TypeError:
         pytest.fail()
+
+
+def test_schemas_are_cached():
+    class Cached(doc.Model):
+        bar: str = doc.field(max_length=3)
+
+    serializer.schema_cache.clear()
+    first = serializer.serialize(Cached)
+    misses = serializer.schema_cache.misses
+    second = serializer.serialize(Cached)
+
+    assert first == second
+    assert first is not second
+    assert serializer.schema_cache.misses == misses
+    assert serializer.schema_cache.hits == 1
+
+
+def test_schema_cache_is_keyed_by_metadata():
+    @attr.s
+    class Foo:
+        short: str = doc.field(max_length=3)
+        long: str = doc.field(max_length=300)
+
+    short, long = attr.fields(Foo)
+    assert serializer.serialize(short)['maxLength'] == 3
+    assert serializer.serialize(long)['maxLength'] == 300
+
+
+def test_schema_cache_records_every_required_field():
+    @attr.s
+    class Foo:
+        first: str = doc.field(required=True)
+        second: str = doc.field(required=True)
+
+    for field in attr.fields(Foo):
+        serializer.serialize(field, Foo)
+    assert serializer.required_fields[Foo] == ['first', 'second']
+
+
+def test_schema_cache_is_bounded():
+    cache = serializer.SchemaCache(maxsize=2)
+    cache.put((int, None, None), ({}, False))
+    cache.put((str, None, None), ({}, False))
+    cache.get((int, None, None))
+    cache.put((float, None, None), ({}, False))
+
+    assert cache.get((str, None, None)) is None
+    assert cache.get((int, None, None)) is not None
+    assert cache.info().currsize == 2
+
+
+def test_schema_cache_invalidation():
+    cache = serializer.SchemaCache()
+    cache.put((int, None, None), ({}, False))
+    cache.put((int, None, str), ({}, False))
+    cache.put((str, None, None), ({}, False))
+    cache.invalidate(int)
+
+    assert cache.info().currsize == 1
+    assert cache.get((str, None, None)) is not None
+
+
+def test_serialize_discriminated_union():
+    class Kind(Enum):
+        CAT = 'cat'
+
+    class Cat(doc.Model):
+        kind: Kind = doc.field(default=Kind.CAT)
+
+    class Dog(doc.Model):
+        kind: str = doc.field()
+
+    class Owner(doc.Model):
+        pet: Union[Cat, Dog] = doc.field(discriminator='kind')
+        pets: List[Union[Cat, Dog]] = doc.field(discriminator='kind')
+
+    registry = serializer.SchemaRegistry()
+    serializer._serialize_type(Owner, None, registry)
+    properties = registry.definitions[Owner]['properties']
+    discriminator = {
+        'propertyName': 'kind',
+        'mapping': {
+            'cat': '#/definitions/Cat',
+            'Dog': '#/definitions/Dog',
+        },
+    }
+    assert properties['pet']['discriminator'] == discriminator
+    assert len(properties['pet']['oneOf']) == 2
+    assert properties['pets']['items']['discriminator'] == discriminator
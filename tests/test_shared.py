@@ -0,0 +1,50 @@
+from sanic import Sanic
+from sanic_swagger import shared
+from sanic_swagger.encoded import EncodedBody
+
+
+def test_first_caller_builds_the_body(tmpdir):
+    path = str(tmpdir.join('spec.json'))
+    body = shared.shared_body(path, lambda: EncodedBody(b'{"built":1}'))
+    assert bytes(body.body) == b'{"built":1}'
+
+
+def test_other_callers_reuse_the_body(tmpdir):
+    path = str(tmpdir.join('spec.json'))
+    first = shared.shared_body(path, lambda: EncodedBody(b'{"built":1}'))
+
+    def build():
+        raise AssertionError('the spec should not be built again')
+
+    second = shared.shared_body(path, build)
+    assert bytes(second.body) == bytes(first.body)
+    assert second.etag == first.etag
+
+
+def test_bodies_of_other_runs_are_built_again(tmpdir, monkeypatch):
+    path = str(tmpdir.join('spec.json'))
+    shared.shared_body(path, lambda: EncodedBody.from_json({'a': 'b' * 100}))
+    monkeypatch.setattr(shared, 'run_id', 'next-run')
+    body = shared.shared_body(path, lambda: EncodedBody(b'{"built":2}'))
+    assert bytes(body.body) == b'{"built":2}'
+    assert body.gzip is None
+    assert not tmpdir.join('spec.json.gz').exists()
+    assert sorted(f.basename for f in tmpdir.listdir()) == [
+        'spec.json',
+        'spec.json.id',
+        'spec.json.lock',
+    ]
+
+
+def test_default_path_is_per_run(monkeypatch):
+    app = Sanic('shared')
+    first = shared.default_path(app)
+    monkeypatch.setattr(shared, 'run_id', 'next-run')
+    assert shared.default_path(app) != first
+
+
+def test_remove_deletes_every_file(tmpdir):
+    path = str(tmpdir.join('spec.json'))
+    shared.shared_body(path, lambda: EncodedBody.from_json({'a': 'b' * 100}))
+    shared.remove(path)
+    assert tmpdir.listdir() == []
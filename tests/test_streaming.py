@@ -0,0 +1,203 @@
+import base64
+import json
+from typing import List
+
+import pytest
+from sanic import Sanic
+from sanic.response import json as json_response
+from sanic_swagger import doc, openapi_blueprint
+from sanic_swagger.binary import LazyBytes
+from sanic_swagger.streaming import JSONArrayDecoder, NDJSONDecoder
+
+
+def decode(decoder, body, size):
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(decoder.feed(body[start:start + size]))
+    return items + decoder.close()
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 1000])
+def test_json_array_decoder(size):
+    data = [{'name': 'é"{}[]', 'count': index} for index in range(20)]
+    data += [123456, -1.5e3, True, None, [1, [2]], 'x', 'a\\', {'b\\"': []}]
+    body = json.dumps(data).encode('utf-8')
+    assert decode(JSONArrayDecoder(), body, size) == data
+
+
+@pytest.mark.parametrize('body', [
+    b'{}', b'[1,,2]', b'[1 2]', b'[1', b'[1] x', b'[tru]', b'[1.]', b'[1,]',
+])
+def test_json_array_decoder_rejects_invalid_arrays(body):
+    with pytest.raises(ValueError):
+        decode(JSONArrayDecoder(), body, 1)
+
+
+def test_json_array_decoder_parses_items_once():
+    decoder = JSONArrayDecoder()
+    parsed = []
+    decode_item = decoder._decoder.decode
+    decoder._decoder.decode = lambda text: parsed.append(text) or (
+        decode_item(text)
+    )
+    item = {'values': ['x' * 10] * 1000}
+    body = json.dumps([item, item]).encode('utf-8')
+    assert decode(decoder, body, 100) == [item, item]
+    assert len(parsed) == 2
+
+
+def test_json_array_decoder_bounds_items():
+    decoder = JSONArrayDecoder(max_item_size=10)
+    with pytest.raises(ValueError):
+        decoder.feed(b'["' + b'x' * 20)
+
+
+@pytest.mark.parametrize('size', [1, 5, 1000])
+def test_ndjson_decoder(size):
+    body = b'{"a": 1}\r\n\n{"a": 2}\n3'
+    assert decode(NDJSONDecoder(), body, size) == [{'a': 1}, {'a': 2}, 3]
+
+
+class Item(doc.Model):
+    name: str = doc.field(min_length=1)
+
+
+@pytest.fixture
+def app():
+    app = Sanic(__name__)
+
+    @app.post('/items', stream=True)
+    @doc.consumes(List[Item], location='body', stream=True)
+    async def import_items(request, body):
+        assert request.stream is not None
+        names = []
+        async for item in body:
+            names.append(item.name)
+        return json_response(names)
+
+    @app.post('/chunks', stream=True)
+    @doc.consumes(List[Item], location='body', stream=True, chunk_size=2)
+    async def import_chunks(request, body):
+        return json_response([
+            [item.name for item in chunk] async for chunk in body
+        ])
+
+    @app.post('/buffered')
+    @doc.consumes(List[Item], location='body', stream=True)
+    async def buffered(request, body):
+        return json_response([item.name async for item in body])
+
+    return app
+
+
+def test_stream_json_array(app):
+    items = [{'name': str(index)} for index in range(5)]
+    _, response = app.test_client.post('/items', data=json.dumps(items))
+    assert response.status == 200
+    assert response.json == ['0', '1', '2', '3', '4']
+
+
+def test_stream_ndjson_in_chunks(app):
+    body = '\n'.join(json.dumps({'name': str(index)}) for index in range(5))
+    _, response = app.test_client.post(
+        '/chunks',
+        data=body,
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.json == [['0', '1'], ['2', '3'], ['4']]
+
+
+def test_stream_without_a_streamed_route(app):
+    _, response = app.test_client.post('/buffered', data='[{"name": "a"}]')
+    assert response.json == ['a']
+
+
+@pytest.mark.parametrize('body', ['[{"name": ""}]', '[1]', '{"name": "a"}'])
+def test_stream_invalid_items(app, body):
+    _, response = app.test_client.post('/items', data=body)
+    assert response.status == 400
+
+
+def test_only_lists_are_streamed():
+    with pytest.raises(TypeError):
+        doc.consumes(Item, location='body', stream=True)(print)
+
+
+async def _produce(count):
+    for index in range(count):
+        yield Item(str(index))
+
+
+@pytest.fixture
+def producing_app():
+    app = Sanic(__name__)
+    app.blueprint(openapi_blueprint)
+
+    @app.get('/items')
+    @doc.produces(List[Item], stream='array')
+    async def export_items(request):
+        return doc.stream_response(_produce(int(request.args.get('count'))))
+
+    @app.get('/items.ndjson')
+    @doc.produces(List[Item], stream='ndjson')
+    async def export_ndjson(request):
+        return doc.stream_response(
+            [Item('a'), Item('b')], kind='ndjson', headers={'X-Export': '1'}
+        )
+
+    return app
+
+
+@pytest.mark.parametrize('count', [0, 1, 5000])
+def test_stream_response_array(producing_app, count):
+    _, response = producing_app.test_client.get(
+        '/items', params={'count': count}
+    )
+    assert response.status == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.headers['Transfer-Encoding'] == 'chunked'
+    assert response.json == [{'name': str(i)} for i in range(count)]
+
+
+def test_stream_response_ndjson(producing_app):
+    _, response = producing_app.test_client.get('/items.ndjson')
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    assert response.headers['X-Export'] == '1'
+    assert response.text == '{"name":"a"}\n{"name":"b"}\n'
+
+
+def test_stream_response_bytes(producing_app):
+    data = bytes(range(256)) * 2000
+
+    @producing_app.get('/blobs')
+    async def export_blobs(request):
+        return doc.stream_response(
+            [data, LazyBytes('AAE='), LazyBytes.from_bytes(b'ab')]
+        )
+
+    _, response = producing_app.test_client.get('/blobs')
+    assert response.json == [
+        base64.b64encode(data).decode('ascii'),
+        'AAE=',
+        'YWI=',
+    ]
+
+
+def test_streamed_content_types_are_documented(producing_app):
+    _, response = producing_app.test_client.get('/openapi/spec.json')
+    paths = response.json['paths']
+    assert paths['/items']['get']['produces'] == ['application/json']
+    assert paths['/items.ndjson']['get']['produces'] == [
+        'application/x-ndjson'
+    ]
+    assert paths['/items.ndjson']['get']['responses']['200']['schema'] == {
+        'type': 'array',
+        'items': {'type': 'object', '$ref': '#/definitions/Item'},
+    }
+
+
+def test_stream_response_kinds():
+    with pytest.raises(ValueError):
+        doc.stream_response([], kind='csv')
+    with pytest.raises(ValueError, match="not 'csv'"):
+        doc.produces(Item, stream='csv')
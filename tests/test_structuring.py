@@ -0,0 +1,149 @@
+from enum import Enum
+from typing import Dict, List, Optional, Union
+
+import attr
+import pytest
+from sanic_swagger import doc
+
+
+class Color(Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+class Tag(doc.Model):
+    name: str = doc.field(min_length=1)
+    color: Optional[Color] = doc.field(default=None)
+
+
+class Pet(doc.Model):
+    name: str = doc.field()
+    tag: Tag = doc.field()
+    friend: Optional[Tag] = doc.field(default=None)
+    tags: List[Tag] = doc.field(factory=list)
+    by_name: Dict[str, Tag] = doc.field(factory=dict)
+    colors: List[Color] = doc.field(factory=list)
+    age: int = doc.field(default=0)
+
+
+def test_from_dict_structures_nested_values():
+    pet = Pet.from_dict({
+        'name': 'Rex',
+        'tag': {'name': 'dog', 'color': 'red'},
+        'tags': [{'name': 'a'}, {'name': 'b', 'color': 'blue'}],
+        'by_name': {'c': {'name': 'c'}},
+        'colors': ['blue'],
+        'extra': 'ignored',
+    })
+
+    assert pet == Pet(
+        name='Rex',
+        tag=Tag(name='dog', color=Color.RED),
+        tags=[Tag(name='a'), Tag(name='b', color=Color.BLUE)],
+        by_name={'c': Tag(name='c')},
+        colors=[Color.BLUE],
+    )
+    assert pet.friend is None
+    assert pet.age == 0
+
+
+def test_from_dict_defaults_are_not_shared():
+    first = Pet.from_dict({'name': 'a', 'tag': {'name': 'a'}})
+    second = Pet.from_dict({'name': 'b', 'tag': {'name': 'b'}})
+    assert first.tags == [] and first.tags is not second.tags
+
+
+def test_from_dict_keeps_instances():
+    tag = Tag(name='dog')
+    assert Pet.from_dict({'name': 'Rex', 'tag': tag}).tag is tag
+    assert Tag.from_dict(tag) is tag
+
+
+def test_from_dict_missing_field():
+    with pytest.raises(TypeError, match="missing required field 'tag'"):
+        Pet.from_dict({'name': 'Rex'})
+
+
+def test_from_dict_validates():
+    with pytest.raises(ValueError):
+        Pet.from_dict({'name': 'Rex', 'tag': {'name': ''}})
+
+
+def test_from_dict_runs_attrs_validators():
+    class Number(doc.Model):
+        n: int = doc.field(validator=attr.validators.instance_of(int))
+
+    assert Number.from_dict({'n': 1}).n == 1
+    with pytest.raises(TypeError):
+        Number.from_dict({'n': 'x'})
+
+
+@pytest.mark.parametrize('data', [
+    {'name': 'Rex', 'tag': 'dog'},
+    {'name': 'Rex', 'tag': {'name': 'a'}, 'friend': [1, 2]},
+    {'name': 'Rex', 'tag': {'name': 'a'}, 'tags': [5]},
+    {'name': 'Rex', 'tag': {'name': 'a'}, 'by_name': ['c']},
+])
+def test_from_dict_rejects_values_that_are_not_objects(data):
+    with pytest.raises(TypeError, match='object'):
+        Pet.from_dict(data)
+
+
+def test_from_dict_runs_post_init():
+    class Counted(doc.Model):
+        count: int = doc.field()
+
+        def __attrs_post_init__(self):
+            self.count += 1
+
+    assert Counted.from_dict({'count': 1}).count == 2
+
+
+def test_from_dict_is_compiled_per_class():
+    class Base(doc.Model):
+        name: str = doc.field()
+
+    class Child(Base):
+        age: int = doc.field(default=1)
+
+    assert type(Base.from_dict({'name': 'a'})) is Base
+    assert Child.from_dict({'name': 'a'}) == Child(name='a', age=1)
+    assert (
+        Base.__dict__['__structure__'] is not Child.__dict__['__structure__']
+    )
+
+
+def test_from_list():
+    tags = Tag.from_list([{'name': 'a'}, {'name': 'b', 'color': 'red'}])
+    assert tags == [Tag(name='a'), Tag(name='b', color=Color.RED)]
+
+
+class Cat(doc.Model):
+    kind: str = doc.field(default='cat')
+    name: str = doc.field(default='')
+
+
+class Dog(doc.Model):
+    kind: str = doc.field(default='dog')
+    good: bool = doc.field(default=True)
+
+
+class Owner(doc.Model):
+    pet: Union[Cat, Dog] = doc.field(discriminator='kind')
+    pets: List[Union[Cat, Dog]] = doc.field(
+        factory=list, discriminator='kind'
+    )
+
+
+def test_from_dict_dispatches_on_discriminator():
+    owner = Owner.from_dict({
+        'pet': {'kind': 'dog', 'good': False},
+        'pets': [{'kind': 'cat', 'name': 'Tom'}, {'kind': 'dog'}],
+    })
+    assert owner.pet == Dog(good=False)
+    assert owner.pets == [Cat(name='Tom'), Dog()]
+
+
+def test_from_dict_unknown_discriminator():
+    with pytest.raises(ValueError, match="'kind' must be one of"):
+        Owner.from_dict({'pet': {'kind': 'bird'}})
@@ -1,5 +1,9 @@
+import asyncio
+from typing import Dict, List
+
 import pytest
 import attr
+from sanic_swagger import doc, validators
 from sanic_swagger.validators import (
     min_str_len,
     max_str_len,
@@ -91,3 +95,183 @@ def test_min_max_str_len_does_not_raise_an_error(attribute):
         min_max_str_len(None, attribute, 'lessthan12')
     except ValueError:
         pytest.fail('max_str_len validator is broken')
+
+
+def test_min_str_len_is_inclusive(attribute):
+    try:
+        min_str_len(None, attribute, 'four')
+    except ValueError:
+        pytest.fail('min_length should be inclusive')
+
+
+class Constrained(doc.Model):
+    name: str = doc.field(min_length=2, max_length=5, pattern='^[a-z]+$')
+    email: str = doc.field(default=None, format='email')
+    age: int = doc.field(default=0, minimum=0, maximum=150)
+    ratio: float = doc.field(
+        default=0.5, minimum=0, maximum=1, exclusive_maximum=True
+    )
+    step: int = doc.field(default=10, multiple_of=5)
+    tags: List[str] = doc.field(
+        default=None, min_items=1, max_items=3, unique_items=True
+    )
+    extra: Dict[str, str] = doc.field(default=None, max_properties=1)
+
+
+def test_compiled_validator_accepts_valid_models():
+    Constrained('abc', 'a@b.co', 150, 0.99, 15, ['a', 'b'], {'a': 'b'})
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'name': 'a'},
+    {'name': 'abcdef'},
+    {'name': 'ABC'},
+    {'email': 'not an email'},
+    {'age': -1},
+    {'age': 151},
+    {'ratio': 1},
+    {'step': 12},
+    {'tags': []},
+    {'tags': ['a', 'b', 'c', 'd']},
+    {'tags': ['a', 'a']},
+    {'extra': {'a': 'b', 'c': 'd'}},
+])
+def test_compiled_validator_rejects_invalid_models(kwargs):
+    with pytest.raises(ValueError):
+        Constrained(**{'name': 'abc', **kwargs})
+
+
+def test_models_without_constraints_are_not_validated():
+    class Unconstrained(doc.Model):
+        name: str = doc.field()
+
+    assert validators.compile_validator(Unconstrained) is None
+    Unconstrained('')
+
+
+def test_validation_runs_before_a_custom_post_init():
+    calls = []
+
+    class WithPostInit(doc.Model):
+        name: str = doc.field(min_length=2)
+
+        def __attrs_post_init__(self):
+            calls.append(self.name)
+
+    with pytest.raises(ValueError):
+        WithPostInit('a')
+    WithPostInit('ab')
+    assert calls == ['ab']
+
+
+def test_swagger_2_exclusive_minimum_flag():
+    class Positive(doc.Model):
+        value: int = doc.field(minimum=0, exclusive_minimum=True)
+
+    Positive(1)
+    with pytest.raises(ValueError):
+        Positive(0)
+
+
+def test_unique_items_with_unhashable_items():
+    class Unique(doc.Model):
+        values: List[dict] = doc.field(unique_items=True)
+
+    Unique([{'a': 1}, {'a': 2}])
+    with pytest.raises(ValueError):
+        Unique([{'a': 1}, {'a': 1}])
+
+
+@pytest.mark.parametrize('pattern, anchored', [
+    ('^[a-z]+$', True),
+    ('^(a|b)c', True),
+    ('^a|b', False),
+    ('^[|]a', True),
+    ('^[]|]a', True),
+    ('^a\\|b', True),
+    ('a^', False),
+])
+def test_anchored_patterns(pattern, anchored):
+    assert validators._is_anchored(pattern) is anchored
+
+
+def test_compiled_patterns_are_shared():
+    class First(doc.Model):
+        name: str = doc.field(pattern='^x+$')
+
+    class Second(doc.Model):
+        code: str = doc.field(pattern='^x+$')
+
+    checker = validators.compile_pattern('^x+$')
+    assert checker is validators.compile_pattern('^x+$')
+    assert checker.__name__ == 'match'
+    assert validators.compile_pattern('x+').__name__ == 'search'
+    First('xx')
+    with pytest.raises(ValueError):
+        Second('y')
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _known_name(instance, attribute, value):
+    await asyncio.sleep(0)
+    if value == 'unknown':
+        raise ValueError("'{}' is unknown".format(attribute.name))
+
+
+def test_async_validators():
+    class User(doc.Model):
+        name: str = doc.field(async_validator=_known_name)
+
+    _run(doc.validate_async(User('known')))
+    with pytest.raises(ValueError, match="'name' is unknown"):
+        _run(doc.validate_async(User('unknown')))
+
+
+def test_batched_async_validators_walk_the_model_tree():
+    calls = []
+
+    @doc.batched
+    async def exist(values):
+        calls.append(values)
+        if 0 in values:
+            raise ValueError('missing')
+
+    class Item(doc.Model):
+        product_id: int = doc.field(async_validator=exist)
+
+    class Order(doc.Model):
+        items: List[Item] = doc.field()
+        parent: 'Order' = doc.field(default=None)
+        by_name: Dict[str, Item] = doc.field(factory=dict)
+
+    order = Order(
+        items=[Item(1), Item(2)],
+        parent=Order(items=[Item(3)]),
+        by_name={'a': Item(4)},
+    )
+    _run(doc.validate_async([order]))
+    assert len(calls) == 1
+    assert sorted(calls[0]) == [1, 2, 3, 4]
+
+    with pytest.raises(ValueError, match='missing'):
+        _run(doc.validate_async(Order(items=[Item(1), Item(0)])))
+
+
+class Node(doc.Model):
+    name: str = doc.field(async_validator=_known_name)
+    children: List['Node'] = doc.field(factory=list)
+
+
+def test_async_validators_in_recursive_models():
+    class Tree(doc.Model):
+        root: Node = doc.field()
+
+    with pytest.raises(ValueError):
+        _run(doc.validate_async(Tree(Node('a', [Node('unknown')]))))